@@ -16,7 +16,9 @@ message_2 = ('Features: \n'
 		 	+ '\tEn Passant implemented\n'
 		 	+ '\tBoard Reset Implemented\n'
 		  	+ '\tCritical junctures from professional games available for practice\n'
-		 	+ '\tButton for easy testing of critical chess features\n')
+		 	+ '\tButton for easy testing of critical chess features\n'
+		 	+ '\tHint button for an engine suggestion, worked out in the background\n'
+		 	+ '\tCPU button to play against the engine, which thinks on your time\n')
 
 message_label_1 = Label(window, text = message_1, font = ('Arial',12))
 message_label_1.pack()
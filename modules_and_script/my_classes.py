@@ -1,8 +1,30 @@
 import numpy as np
+from my_bitboards import (WHITE, BLACK, KNIGHT_ATTACKS, KING_ATTACKS,
+    PAWN_ATTACKS, piece_code, rook_attacks, bishop_attacks, queen_attacks)
+from my_position import Position, COLORS, PIECE_TYPES, move_target
+
+
+def bitboard_to_array(bb):
+    """Converts a bitboard into an 8x8 array with 1 on every set square.
+    
+    Args:
+        bb(int): The bitboard, with square rw*8 + cl for row rw and column cl.
+        
+    Returns:
+        allowed_moves(numpy array): An array with 1 in the set squares.
+    """
+    bits = np.unpackbits(np.array([bb], dtype = '<u8').view(np.uint8),
+                         bitorder = 'little')
+    return bits.reshape(8, 8).astype(float)
 
 
 class Piece():
     """Generic piece containing all standard chess moves, and a check for check.
+    
+    Pieces don't keep any state of their own, so one instance of each kind of
+    piece can be shared by every board. Whether a king or rook has moved, and
+    which pawn can be taken en passant, is kept by the Position.
+    
     Args:
         color(str): Color of the piece ('b' for Black or 'w' for White).
         piece(str): Type of piece 'k', 'q', 'r', 'bi', or 'n' for
@@ -12,8 +34,6 @@ class Piece():
         piece(str): Type of piece ('k', 'q', 'r', 'bi', or 'n')
         color(str): Color of piece ('b' or 'w')
         sym(str): Unicode symbol of the piece.
-        moves(int): The number of times the piece has moved.
-        justmoved(bool): Is true if the piece has just moved, False otherwise.
     """
     # Creating an empty board which will be updated later.
     current_board = np.zeros((8,8))
@@ -51,8 +71,6 @@ class Piece():
                 symbol = '\u265F' 
                 
         self.sym = symbol
-        self.moves = 0
-        self.justmoved = False
         
 
     def in_board(self, rw,cl):
@@ -76,12 +94,17 @@ class Piece():
         
         Args:
             color(str): Which color king to find.
-            board(numpy array): The current board layout.
+            board(numpy array or Position): The current board layout. A
+                                            Position tracks its kings, so the
+                                            board isn't searched.
 
         Returns:
             King_rw(int): The row location of the king.
             King_cl(int): The column location of the king.
         """
+        if isinstance(board, Position):
+            king_rw, king_cl = divmod(board.king_square(COLORS[color]), 8)
+            return king_rw, king_cl
         for irw in range(8):
             for icl in range(8):
                 if ((board[irw, icl] != 0) and
@@ -93,67 +116,36 @@ class Piece():
 
 
     def check(self, from_rw, from_cl, to_rw, to_cl, board = current_board):
-        """Given a move, checks if the king will be in check.
+        """Given a move, checks if it is legal for the piece.
+
+        Moving to the square the piece is on asks whether the king is in check
+        now instead.
         
         Args:
             from_rw('int'): The row where the piece is moving from.
             from_cl('int'): The column where the piece is moving from.
             to_rw('int'): The row where the piece is moving to.
             to_cl('int'): The column where the piece is moving to.
-            board(numpy array): The board layout on which the piece resides.
+            board(numpy array or Position): The board layout on which the piece
+                                            resides. A Position is used as it
+                                            is, without being rebuilt.
             
         Returns:
-            int: 1 if not in check, and 0 if in check.
+            int: 1 if the move is legal (or, for the same square, the king is
+                 not in check), and 0 otherwise.
         """
-        # new_board is a temporary board to test check on, without changing the
-        # gloabl board.
-        new_board = np.zeros((8,8))
-        new_board = np.array(new_board, dtype = object)
-
-        for irw in range(8):
-            for icl in range(8):
-                new_board[irw,icl] = board[irw,icl]
-
-        # Moving the piece to the new position
-        new_board[to_rw, to_cl] = new_board[from_rw, from_cl]
-        
-        # If the piece has actually moved, clearing the old spot.
-        if (to_rw != from_rw) or (to_cl != from_cl):
-            new_board[from_rw, from_cl] = 0
-        
-        # Checking the location of the king for the current active color.
-        king_rw, king_cl = self.find_king(new_board[to_rw, to_cl].color, new_board)
-        
-        # Checking if the king can be attacked by any rooks.
-        avail_rook_takes = self.avail_rook_takes(king_rw, king_cl, new_board)
-        if self.contains_piece('r',avail_rook_takes,new_board):
-            return 0
-        
-        # Checking if the king can be attacked by any bishops.
-        avail_bishop_takes = self.avail_bishop_takes(king_rw, king_cl, new_board)
-        if self.contains_piece('bi',avail_bishop_takes,new_board):
-            return 0
-            
-        # Checking if the king can be attacked by any queens.
-        avail_queen_takes = self.avail_queen_takes(king_rw, king_cl,new_board)
-        if self.contains_piece('q',avail_queen_takes,new_board):
-            return 0
-        
-        # Checking if the king can be attacked by any knights.
-        avail_knight_takes = self.avail_knight_takes(king_rw, king_cl, new_board)
-        if self.contains_piece('n',avail_knight_takes,new_board):
-            return 0
-        
-        # Checking if the king can be attacked by any pawns.
-        avail_pawn_takes = self.avail_pawn_takes(king_rw, king_cl, new_board)
-        if self.contains_piece('p',avail_pawn_takes,new_board):
-            return 0
-        
-        # Checking if the king can be attacked by the opponent's king.
-        avail_king_takes = self.avail_king_takes(king_rw, king_cl, new_board)
-        if self.contains_piece('k',avail_king_takes,new_board):
-            return 0
-        return 1
+        # The move is tested on a bitboard position, so the board itself is
+        # never copied or changed.
+        position = self.to_position(board)
+        if (from_rw == to_rw) and (from_cl == to_cl):
+            return 0 if position.in_check() else 1
+        
+        # The legal moves of the piece are encoded as they would be played, so
+        # castling and en passant are tested as what they really are
+        to = to_rw*8 + to_cl
+        moves = position.legal_moves_from(from_rw*8 + from_cl,
+                                          *position.check_and_pins())
+        return 1 if any(move_target(move) == to for move in moves) else 0
 
 
     def contains_piece(self, piece,avail_takes,board):
@@ -184,17 +176,20 @@ class Piece():
             cl(int): The column where the piece is at.
             moves_board(numpy array): An array with 1 in rows and columns with
                                       available moves
-            board(numpy array): The board layout on which the piece resides.
+            board(numpy array or Position): The board layout on which the piece
+                                            resides. A Position is used as it
+                                            is, without being rebuilt.
             
         Returns:
             moves_board(numpy array): An array representing moves that won't
                                       put the king into check.           
         
         """
-        for irw in range(8):
-            for icl in range(8):
-                if moves_board[irw, icl] != 0:
-                    moves_board[irw, icl] *= self.check(rw, cl, irw, icl, board)
+        # The pinned pieces and checking pieces are worked out once for the
+        # position, instead of testing every candidate square with check().
+        position = self.to_position(board)
+        quiet, captures = position.legal_targets(rw*8 + cl)
+        moves_board *= bitboard_to_array(quiet | captures)
         return moves_board
 
 
@@ -233,6 +228,45 @@ class Piece():
         allowed_takes = np.zeros((8,8))
         return allowed_takes
     
+    def to_position(self, board):
+        """Returns the board as a Position, with this piece's color to move.
+        
+        Args:
+            board(numpy array or Position): The board layout on which the piece
+                                            resides.
+            
+        Returns:
+            position(Position): The position to generate moves from.
+        """
+        if not isinstance(board, Position):
+            return Position.from_board(board, self.color)
+        if board.side == COLORS[self.color]:
+            return board
+        # The copy has the other side to move and no en passant square, so its
+        # key is worked out again to match
+        position = board.copy()
+        position.side ^= 1
+        position.ep = -1
+        position.key = position.compute_key()
+        return position
+    
+    def bitboard_moves(self, rw, cl, board = current_board):
+        """Legal moves and captures of the piece, from a bitboard position.
+        
+        Args:
+            rw(int): The row where the piece is at.
+            cl(int): The column where the piece is at.
+            board(numpy array or Position): The board layout on which the piece
+                                            resides.
+            
+        Returns:
+            allowed_moves(numpy array): An array representing the legal moves.
+            allowed_takes(numpy array): An array representing legal captures.
+        """
+        position = self.to_position(board)
+        quiet, captures = position.legal_targets(rw*8 + cl)
+        return bitboard_to_array(quiet), bitboard_to_array(captures)
+    
     def can_move(self, rw, cl, board = current_board):
         """Checks if the piece has any legal moves or captures available.
         
@@ -245,9 +279,32 @@ class Piece():
             True if there is a legal move or capture available.           
         
         """
-        allowed_moves = self.legal_moves(rw, cl, board)
-        allowed_takes = self.legal_takes(rw, cl, board)
-        return allowed_moves.any() or allowed_takes.any()
+        # Only needs to know that there is a move, so the masks aren't built
+        position = self.to_position(board)
+        return len(position.legal_moves_from(rw*8 + cl)) > 0
+
+    def board_occupancy(self, board = current_board):
+        """Returns bitboards of the occupied squares of a board.
+        
+        Args:
+            board(numpy array or Position): The board layout on which the piece
+                                            resides.
+            
+        Returns:
+            occupied(int): Bitboard of every square with a piece on it.
+            own(int): Bitboard of the squares with a piece of this color.
+        """
+        if isinstance(board, Position):
+            return (board.occupied[WHITE] | board.occupied[BLACK],
+                    board.occupied[COLORS[self.color]])
+        occupied = 0
+        own = 0
+        for sq, piece in enumerate(board.flat):
+            if piece != 0:
+                occupied |= 1 << sq
+                if piece.color == self.color:
+                    own |= 1 << sq
+        return occupied, own
 
     def avail_rook_moves(self, rw, cl, board = current_board):
         """Returns potentially legal moves for a rook, given position.
@@ -262,34 +319,10 @@ class Piece():
             legal moves.
         
         """
-        allowed_moves = np.zeros((8,8))
-        
-        # Starting at the position of the rook and this iterates up, down, left,
-        # and right storing every empty spot until it's blocked by another piece
-        for num in range(rw, 0, -1):
-            if board[num-1, cl] != 0:
-                break
-            else:
-                allowed_moves[num-1, cl] = 1
-                
-        for num in range(rw, 7):
-            if board[num+1, cl] != 0:
-                break
-            else:
-                allowed_moves[num+1, cl] = 1
-                
-        for num in range(cl, 0, -1):
-            if board[rw, num-1] != 0:
-                break
-            else:
-                allowed_moves[rw, num-1] = 1
-                
-        for num in range(cl, 7):
-            if board[rw, num+1] != 0:
-                break
-            else:
-                allowed_moves[rw, num+1] = 1
-        return allowed_moves
+        # Looks up every square the rook attacks from this position, up to and
+        # including the first piece in each direction, and keeps the empty ones
+        occupied, own = self.board_occupancy(board)
+        return bitboard_to_array(rook_attacks(rw*8 + cl, occupied) & ~occupied)
 
     def avail_rook_takes(self, rw, cl, board = current_board):
         """Returns potentially legal captures for a rook, given position.
@@ -304,54 +337,15 @@ class Piece():
             legal moves.
         
         """
-        allowed_takes = np.zeros((8,8))
-        
-        # Similar to above, this iterates up, down, left, and right, but it
-        # stores the first opponent piece it runs into, along each direction.
-        for num in range(rw, 0, -1):
-            if (board[num-1, cl] != 0) and (board[num-1, cl].color == self.color):
-                break
-            elif board[num-1, cl] == 0:
-                continue
-            else:
-                allowed_takes[num-1, cl] = 1
-                break
-                
-        for num in range(rw, 7):
-            if (board[num+1, cl] != 0) and (board[num+1, cl].color == self.color):
-                break
-            elif board[num+1, cl] == 0:
-                continue
-            else:
-                allowed_takes[num+1, cl] = 1
-                break
-                
-        for num in range(cl, 0, -1):
-            if (board[rw, num-1] != 0) and (board[rw, num-1].color == self.color):
-                break
-            elif board[rw, num-1] == 0:
-                continue
-            else:
-                allowed_takes[rw, num-1] = 1
-                break
-                
-        for num in range(cl, 7):
-            if (board[rw, num+1] != 0) and (board[rw, num+1].color == self.color):
-                break
-            elif board[rw, num+1] == 0:
-                continue
-            else:
-                allowed_takes[rw, num+1] = 1
-                break
-        return allowed_takes
+        # Similar to above, but it keeps the first opponent piece it runs into,
+        # along each direction.
+        occupied, own = self.board_occupancy(board)
+        attacks = rook_attacks(rw*8 + cl, occupied)
+        return bitboard_to_array(attacks & occupied & ~own)
     
     # Same as avail_rook_moves, but it also checks if the king will be in
-    # check with self.check. If the king won't be in check, it saves the
+    # check with self.legal_check. If the king won't be in check, it saves the
     # position.
-    ##
-    # Both functions are necessary as otherwise avail_rook_moves
-    # would be called within itself when self.check is called.
-    ##
     def legal_rook_moves(self, rw, cl, board = current_board):
         """Returns legal moves for a rook, given position.
         
@@ -405,16 +399,10 @@ class Piece():
             legal moves.
         
         """
-        allowed_moves = np.zeros((8,8))
-        potential_moves = [[rw+2, cl+1],[rw+2, cl-1],[rw-2, cl+1],[rw-2, cl-1],
-                           [rw+1, cl+2],[rw-1, cl+2],[rw+1, cl-2],[rw-1, cl-2]]
-        
-        # Checks each potential move to see if it's not blocked and stores them
-        for move in potential_moves:
-            if ((self.in_board(move[0],move[1])) and
-                (board[move[0], move[1]] == 0)):
-                allowed_moves[move[0], move[1]] = 1
-        return allowed_moves
+        # The squares a knight can reach from here come from a precomputed
+        # table, so they are already on the board. Keeps the empty ones.
+        occupied, own = self.board_occupancy(board)
+        return bitboard_to_array(KNIGHT_ATTACKS[rw*8 + cl] & ~occupied)
     
     def avail_knight_takes(self, rw, cl, board = current_board):
         """Returns potentially legal captures for a knight, given position.
@@ -429,17 +417,9 @@ class Piece():
             legal moves.
         
         """
-        allowed_takes = np.zeros((8,8))
-        potential_takes = [[rw+2, cl+1],[rw+2, cl-1],[rw-2, cl+1],[rw-2, cl-1],
-                           [rw+1, cl+2],[rw-1, cl+2],[rw+1, cl-2],[rw-1, cl-2]]
-        
-        # Checks each potential move to look for an opponent's piece
-        for move in potential_takes:
-            if ((self.in_board(move[0],move[1])) and
-                (board[move[0], move[1]] != 0) and
-                (board[move[0], move[1]].color != self.color)):
-                allowed_takes[move[0], move[1]] = 1
-        return allowed_takes
+        # Keeps the squares from the table with an opponent's piece on them
+        occupied, own = self.board_occupancy(board)
+        return bitboard_to_array(KNIGHT_ATTACKS[rw*8 + cl] & occupied & ~own)
     
     def legal_knight_moves(self, rw, cl, board = current_board):
         """Returns legal moves for a knight, given position.
@@ -490,32 +470,8 @@ class Piece():
             legal moves.
         
         """
-        allowed_moves = np.zeros((8,8))
-        for a,b in zip(range(rw, 0, -1),range(cl, 0, -1)):
-            if board[a-1, b-1] != 0:
-                break
-            else:
-                allowed_moves[a-1, b-1] = 1
-                
-        for a,b in zip(range(rw, 7),range(cl, 0, -1)):
-            if board[a+1, b-1] != 0:
-                break
-            else:
-                allowed_moves[a+1, b-1] = 1
-                
-        for a,b in zip(range(rw, 0, -1),range(cl, 7)):
-            if board[a-1, b+1] != 0:
-                break
-            else:
-                allowed_moves[a-1, b+1] = 1
-                
-        for a,b in zip(range(rw, 7),range(cl, 7)):
-            if board[a+1, b+1] != 0:
-                break
-            else:
-                allowed_moves[a+1, b+1] = 1
-                
-        return allowed_moves
+        occupied, own = self.board_occupancy(board)
+        return bitboard_to_array(bishop_attacks(rw*8 + cl, occupied) & ~occupied)
     
     def avail_bishop_takes(self, rw, cl, board = current_board):
         """Returns potentially legal captures for a bishop, given position.
@@ -530,49 +486,12 @@ class Piece():
             legal moves.
         
         """
-        allowed_takes = np.zeros((8,8))
-        
-        # Iterates diagonally in 4 directions, storing position, until it runs
-        # across a blockes space.
-        for a,b in zip(range(rw, 0, -1),range(cl, 0, -1)):
-            if (board[a-1, b-1] != 0) and (board[a-1, b-1].color == self.color):
-                break
-            elif board[a-1, b-1] == 0:
-                continue
-            else:
-                allowed_takes[a-1, b-1] = 1
-                break
-                
-        for a,b in zip(range(rw, 7),range(cl, 0, -1)):
-            if (board[a+1, b-1] != 0) and (board[a+1, b-1].color == self.color):
-                break
-            elif board[a+1, b-1] == 0:
-                continue
-            else:
-                allowed_takes[a+1, b-1] = 1
-                break
-                
-        for a,b in zip(range(rw, 0, -1),range(cl, 7)):
-            if (board[a-1, b+1] != 0) and (board[a-1, b+1].color == self.color):
-                break
-            elif board[a-1, b+1] == 0:
-                continue
-            else:
-                allowed_takes[a-1, b+1] = 1
-                break
-                
-        for a,b in zip(range(rw, 7),range(cl, 7)):
-            if (board[a+1, b+1] != 0) and (board[a+1, b+1].color == self.color):
-                break
-            elif board[a+1, b+1] == 0:
-                continue
-            else:
-                allowed_takes[a+1, b+1] = 1
-                break
-        return allowed_takes
+        # Looks up the diagonals in 4 directions, keeping the first opponent
+        # piece along each one.
+        occupied, own = self.board_occupancy(board)
+        attacks = bishop_attacks(rw*8 + cl, occupied)
+        return bitboard_to_array(attacks & occupied & ~own)
     
-    # Iterates diagonally as before, but stores the first opponent position in
-    # each of the diagonal directions
     def legal_bishop_moves(self, rw, cl, board = current_board):
         """Returns legal moves for a bishop, given position.
         
@@ -625,9 +544,8 @@ class Piece():
         
         """
         # The queen just combines the moves of the bishop and rook
-        allowed_moves = (self.avail_bishop_moves(rw, cl, board)
-                         + self.avail_rook_moves(rw, cl, board))
-        return allowed_moves
+        occupied, own = self.board_occupancy(board)
+        return bitboard_to_array(queen_attacks(rw*8 + cl, occupied) & ~occupied)
     
     def avail_queen_takes(self, rw, cl, board = current_board):
         """Returns potentially legal captures for a queen, given position.
@@ -642,9 +560,9 @@ class Piece():
             legal moves.
         
         """
-        allowed_takes = self.avail_bishop_takes(rw, cl, board)+\
-        self.avail_rook_takes(rw, cl, board)
-        return allowed_takes
+        occupied, own = self.board_occupancy(board)
+        attacks = queen_attacks(rw*8 + cl, occupied)
+        return bitboard_to_array(attacks & occupied & ~own)
  
     def legal_queen_moves(self, rw, cl, board = current_board):
         """Returns legal moves for a queen, given position.
@@ -695,20 +613,21 @@ class Piece():
             legal moves.
         
         """
-        allowed_moves = np.zeros((8,8))       
+        occupied, own = self.board_occupancy(board)
         if self.color == 'w':
-            # Checks if first spot in front is open
-            if (rw-1 >= 0) and (board[rw-1, cl] == 0):
-                allowed_moves[rw-1, cl] = 1
-                # If first spot in front is open, and pawn hasn't moved, and pawn is in row 2 or 7, also checks 2nd spot
-                if (rw-2 >= 0) and (board[rw-2, cl] == 0) and (self.moves == 0) and (rw == 6):
-                    allowed_moves[rw-2, cl] = 1
+            step, start_rw = -8, 6
         else:
-            if (rw+1 <= 7) and (board[rw+1, cl] == 0):
-                allowed_moves[rw+1, cl] = 1
-                if (rw+2 <= 7) and (board[rw+2, cl] == 0) and (self.moves == 0) and (rw == 1):
-                    allowed_moves[rw+2, cl] = 1
-        return allowed_moves
+            step, start_rw = 8, 1
+        moves = 0
+        # Checks if first spot in front is open
+        one = rw*8 + cl + step
+        if (0 <= one < 64) and not (occupied >> one) & 1:
+            moves |= 1 << one
+            # If first spot in front is open, and pawn is still in row 2 or 7,
+            # also checks 2nd spot
+            if (rw == start_rw) and not (occupied >> (one + step)) & 1:
+                moves |= 1 << (one + step)
+        return bitboard_to_array(moves)
     
     def avail_pawn_takes(self, rw, cl, board = current_board):
         """Returns potentially legal captures for a pawn, given position.
@@ -723,31 +642,11 @@ class Piece():
             legal moves.
         
         """
-        allowed_takes = np.zeros((8,8)) 
-        
-        # Checks the first diagonal positions in front for an opponent piece        
-        if self.color == 'w':
-            if ((rw-1 >= 0) and (cl-1 >= 0) and
-                (board[rw-1, cl-1] != 0) and
-                (board[rw-1, cl-1].color != self.color)):
-                allowed_takes[rw-1, cl-1] = 1
-            if ((rw-1 >= 0) and
-                (cl+1 <= 7) and
-                (board[rw-1, cl+1] != 0) and
-                (board[rw-1, cl+1].color != self.color)):
-                allowed_takes[rw-1, cl+1] = 1
-        else:
-            if ((rw+1 <= 7) and
-                (cl-1 >= 0) and
-                (board[rw+1, cl-1] != 0) and
-                (board[rw+1, cl-1].color != self.color)):
-                allowed_takes[rw+1, cl-1] = 1
-            if ((rw+1 <= 7) and
-                (cl+1 <= 7) and
-                (board[rw+1, cl+1] != 0) and
-                (board[rw+1, cl+1].color != self.color)):
-                allowed_takes[rw+1, cl+1] = 1
-        return allowed_takes
+        # Keeps the first diagonal positions in front with an opponent piece,
+        # taken from the pawn attack table for this color
+        occupied, own = self.board_occupancy(board)
+        attacks = PAWN_ATTACKS[COLORS[self.color]][rw*8 + cl]
+        return bitboard_to_array(attacks & occupied & ~own)
     
     def legal_pawn_moves(self, rw, cl, board = current_board):
         """Returns legal moves for a pawn, given position.
@@ -798,18 +697,10 @@ class Piece():
             legal moves.
         
         """
-        allowed_moves = np.zeros((8,8))
-        potential_moves = [[rw-1, cl-1],[rw-1, cl],[rw-1, cl+1],
-                           [rw, cl-1],[rw, cl+1],
-                           [rw+1, cl-1],[rw+1, cl],[rw+1, cl+1]]
-        
-        # This part works similar to how it does for the knight. It checks a set
-        # list of positions around to see if they're on the board and available.
-        for move in potential_moves:
-            if ((self.in_board(move[0],move[1])) and
-                (board[move[0], move[1]] == 0)):
-                allowed_moves[move[0], move[1]] = 1
-        return allowed_moves
+        # This part works similar to how it does for the knight. It keeps the
+        # squares around the king from the table that are empty.
+        occupied, own = self.board_occupancy(board)
+        return bitboard_to_array(KING_ATTACKS[rw*8 + cl] & ~occupied)
     
     def avail_king_takes(self, rw, cl, board = current_board):
         """Returns potentially legal captures for a king, given position.
@@ -824,17 +715,8 @@ class Piece():
             legal moves.
         
         """
-        allowed_takes = np.zeros((8,8))
-        potential_takes = [[rw-1, cl-1],[rw-1, cl],[rw-1, cl+1],
-                           [rw, cl-1],[rw, cl+1],
-                           [rw+1, cl-1],[rw+1, cl],[rw+1, cl+1]]
-        
-        for move in potential_takes:
-            if ((self.in_board(move[0],move[1])) and
-                (board[move[0], move[1]] != 0) and
-                (board[move[0], move[1]].color != self.color)):
-                allowed_takes[move[0], move[1]] = 1
-        return allowed_takes
+        occupied, own = self.board_occupancy(board)
+        return bitboard_to_array(KING_ATTACKS[rw*8 + cl] & occupied & ~own)
     
     def legal_king_moves(self, rw, cl, board = current_board):
         """Returns legal moves for a king, given position.
@@ -882,8 +764,6 @@ class King(Piece):
         piece(str): Type of piece ('k', 'q', 'r', 'bi', or 'n')
         color(str): Color of piece ('b' or 'w')
         sym(str): Unicode symbol of the piece.
-        moves(int): The number of times the piece has moved.
-        justmoved(bool): Is true if the piece has just moved, False otherwise.
     """
     current_board = np.zeros((8,8))
     
@@ -902,41 +782,10 @@ class King(Piece):
             allowed_moves(numpy array): An array representing the legal moves.           
         """
         
-        legal_king_moves = self.legal_king_moves(rw, cl, board)
-
-        # This sections checks if the king can castle: checking that the king
-        # and each rook haven't moved, and that the spaces between are clear
-        if ((self.moves == 0) and # King hasn't moved
-            (self.check(rw, cl, rw, cl, board) == 1) and # Not in check
-            (board[rw, cl-1] == 0) and # Spot to left is clear
-            (self.check(rw, cl, rw, cl-1, board) == 1) and # Spot left is safe
-            (board[rw, cl-2] == 0) and # 2nd spot left is clear
-            (self.check(rw, cl, rw, cl-2, board) == 1) and # 2nd spot left is safe
-            (board[rw, cl-3] == 0)  and # 3rd spot to left is clear
-            (board[rw, cl-4] != 0) and # Rook spot isn't empty
-            (board[rw, cl-4].piece == 'r') and # Rook is in place
-            (board[rw, cl-4].moves == 0)): # Rook hasn't moved
-            if self.color == 'w':
-                legal_king_moves[7,2] = 1
-            else:
-                legal_king_moves[0,2] = 1    
-
-        if ((cl == 4) and
-            ((rw == 7) or(rw == 0)) and
-            (self.moves == 0) and
-            (self.check(rw, cl, rw, cl, board) == 1) and
-            (board[rw, cl+1] == 0) and
-            (self.check(rw, cl, rw, cl+1, board) == 1) and
-            (board[rw, cl+2] == 0) and
-            (self.check(rw, cl, rw, cl+2, board) == 1) and
-            (board[rw, cl+3] != 0) and
-            (board[rw, cl+3].piece == 'r') and
-            (board[rw, cl+3].moves == 0)):
-            if self.color == 'w':
-                legal_king_moves[7,6] = 1
-            else:
-                legal_king_moves[0,6] = 1
-        return legal_king_moves
+        # Castling is included in the moves: the position only allows it if
+        # it still has the castling right, the spaces between the king and
+        # rook are clear, and the king doesn't start, pass or land in check.
+        return self.bitboard_moves(rw, cl, board)[0]
         
             
     
@@ -951,7 +800,7 @@ class King(Piece):
         Returns:
             allowed_takes(numpy array): An array representing legal captures.           
         """
-        return self.legal_king_takes(rw, cl, board)
+        return self.bitboard_moves(rw, cl, board)[1]
 
     
 class Pawn(Piece):
@@ -964,8 +813,6 @@ class Pawn(Piece):
         piece(str): Type of piece ('k', 'q', 'r', 'bi', or 'n')
         color(str): Color of piece ('b' or 'w')
         sym(str): Unicode symbol of the piece.
-        moves(int): The number of times the piece has moved.
-        justmoved(bool): Is true if the piece has just moved, False otherwise.
     """
     current_board = np.zeros((8,8))
     
@@ -983,7 +830,7 @@ class Pawn(Piece):
         Returns:
             allowed_moves(numpy array): An array representing the legal moves.           
         """
-        return self.legal_pawn_moves(rw, cl, board)
+        return self.bitboard_moves(rw, cl, board)[0]
     
     def legal_takes(self, rw, cl, board = current_board):
         """Spaces where the piece can move to legally, for captures.
@@ -996,34 +843,9 @@ class Pawn(Piece):
         Returns:
             allowed_takes(numpy array): An array representing legal captures.           
         """
-        legal_pawn_takes = self.legal_pawn_takes(rw, cl, board)
-        
-        # This is an implementation of En passant, which allows the pawn to
-        # take an opponent's pawn while it's behind, in specific instances.
-        if ((cl-1 >= 0) and
-            ((rw == 3) or (rw == 4)) and # The attacking pawn is here
-            (board[rw, cl-1] != 0) and # A piece is behind it
-            (board[rw, cl-1].justmoved) and # That piece just moved
-            (board[rw, cl-1].color != self.color) and # Opponent piece
-            (board[rw, cl-1].piece == 'p') and # Opponent piece = pawn
-            (board[rw, cl-1].moves == 1)): # Opponent pawn moved once
-            if self.color == 'w':
-                legal_pawn_takes[rw-1, cl-1] = 1 # Sets an extra legal take
-            else:
-                legal_pawn_takes[rw+1, cl-1] = 1
-                
-        if ((cl+1 <= 7) and
-            ((rw == 3) or (rw == 4)) and
-            (board[rw, cl+1] != 0) and
-            (board[rw, cl+1].justmoved) and
-            (board[rw, cl+1].color != self.color) and
-            (board[rw, cl+1].piece == 'p') and
-            (board[rw, cl+1].moves == 1)):
-            if self.color == 'w':
-                legal_pawn_takes[rw-1, cl+1] = 1
-            else:
-                legal_pawn_takes[rw+1, cl+1] = 1
-        return legal_pawn_takes
+        # En passant captures are included when the board is a Position whose
+        # last move was a pawn moving two spaces, next to this one.
+        return self.bitboard_moves(rw, cl, board)[1]
     
     
 class Knight(Piece):
@@ -1036,8 +858,6 @@ class Knight(Piece):
         piece(str): Type of piece ('k', 'q', 'r', 'bi', or 'n')
         color(str): Color of piece ('b' or 'w')
         sym(str): Unicode symbol of the piece.
-        moves(int): The number of times the piece has moved.
-        justmoved(bool): Is true if the piece has just moved, False otherwise.
     """
     current_board = np.zeros((8,8))
     
@@ -1055,7 +875,7 @@ class Knight(Piece):
         Returns:
             allowed_moves(numpy array): An array representing the legal moves.           
         """
-        return self.legal_knight_moves(rw, cl, board)
+        return self.bitboard_moves(rw, cl, board)[0]
     
     def legal_takes(self, rw, cl, board = current_board):
         """Spaces where the piece can move to legally, for captures.
@@ -1068,7 +888,7 @@ class Knight(Piece):
         Returns:
             allowed_takes(numpy array): An array representing legal captures.           
         """
-        return self.legal_knight_takes(rw, cl, board)
+        return self.bitboard_moves(rw, cl, board)[1]
     
     
 class Rook(Piece):
@@ -1081,8 +901,6 @@ class Rook(Piece):
         piece(str): Type of piece ('k', 'q', 'r', 'bi', or 'n')
         color(str): Color of piece ('b' or 'w')
         sym(str): Unicode symbol of the piece.
-        moves(int): The number of times the piece has moved.
-        justmoved(bool): Is true if the piece has just moved, False otherwise.
     """
     current_board = np.zeros((8,8))
     
@@ -1100,7 +918,7 @@ class Rook(Piece):
         Returns:
             allowed_moves(numpy array): An array representing the legal moves.           
         """
-        return self.legal_rook_moves(rw, cl, board)
+        return self.bitboard_moves(rw, cl, board)[0]
     
     def legal_takes(self, rw, cl, board = current_board):
         """Spaces where the piece can move to legally, for captures.
@@ -1113,7 +931,7 @@ class Rook(Piece):
         Returns:
             allowed_takes(numpy array): An array representing legal captures.           
         """
-        return self.legal_rook_takes(rw, cl, board)
+        return self.bitboard_moves(rw, cl, board)[1]
     
     
 class Bishop(Piece):
@@ -1126,8 +944,6 @@ class Bishop(Piece):
         piece(str): Type of piece ('k', 'q', 'r', 'bi', or 'n')
         color(str): Color of piece ('b' or 'w')
         sym(str): Unicode symbol of the piece.
-        moves(int): The number of times the piece has moved.
-        justmoved(bool): Is true if the piece has just moved, False otherwise.
     """
     current_board = np.zeros((8,8))
     
@@ -1145,7 +961,7 @@ class Bishop(Piece):
         Returns:
             allowed_moves(numpy array): An array representing the legal moves.           
         """
-        return self.legal_bishop_moves(rw, cl, board)
+        return self.bitboard_moves(rw, cl, board)[0]
     
     def legal_takes(self, rw, cl, board = current_board):
         """Spaces where the piece can move to legally, for captures.
@@ -1158,7 +974,7 @@ class Bishop(Piece):
         Returns:
             allowed_takes(numpy array): An array representing legal captures.           
         """
-        return self.legal_bishop_takes(rw, cl, board)
+        return self.bitboard_moves(rw, cl, board)[1]
     
     
 class Queen(Piece):
@@ -1171,8 +987,6 @@ class Queen(Piece):
         piece(str): Type of piece ('k', 'q', 'r', 'bi', or 'n')
         color(str): Color of piece ('b' or 'w')
         sym(str): Unicode symbol of the piece.
-        moves(int): The number of times the piece has moved.
-        justmoved(bool): Is true if the piece has just moved, False otherwise.
     """
     current_board = np.zeros((8,8))
     
@@ -1190,7 +1004,7 @@ class Queen(Piece):
         Returns:
             allowed_moves(numpy array): An array representing the legal moves.           
         """
-        return self.legal_queen_moves(rw, cl, board)
+        return self.bitboard_moves(rw, cl, board)[0]
     
     def legal_takes(self, rw, cl, board = current_board):
         """Spaces where the piece can move to legally, for captures.
@@ -1203,5 +1017,13 @@ class Queen(Piece):
         Returns:
             allowed_takes(numpy array): An array representing legal captures.           
         """
-        return self.legal_queen_takes(rw, cl, board)
+        return self.bitboard_moves(rw, cl, board)[1]
+
 
+# One shared instance of every piece, indexed by piece code, for drawing
+# positions. Since pieces have no state, any instance of the same kind would do.
+PIECES = [0] * 16
+for _color in ('w', 'b'):
+    for _piece in (King(_color), Queen(_color), Rook(_color), Bishop(_color),
+                   Knight(_color), Pawn(_color)):
+        PIECES[piece_code(COLORS[_color], PIECE_TYPES[_piece.piece])] = _piece
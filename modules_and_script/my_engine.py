@@ -0,0 +1,672 @@
+"""Chess engine: finds the best move of a position by searching ahead.
+
+The search is negamax with alpha-beta pruning, run again one move deeper each
+time (iterative deepening) until a depth, node or time limit is reached. At
+the end of each line a quiescence search plays out the captures that don't
+lose material, so a position isn't scored in the middle of an exchange.
+
+Only the first move of a node is searched with the full window (principal
+variation search). The others only have to be proved worse, with a zero
+window, and are searched again if they turn out better. Each iteration
+starts with a narrow window around the last score (aspiration), widened
+if the score falls outside it. The best line is kept in a triangular table
+as it is found, so the whole line is known after every iteration. It
+works on Position from my_position, so it needs no board or window, and can
+analyse the famous game positions from the command line:
+
+    python my_engine.py --movetime 5
+    python my_engine.py --depth 4 --positions tests
+"""
+import argparse
+import time
+from my_bitboards import (WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+    piece_code, squares_of)
+from my_position import Position, move_name
+from my_transposition import TranspositionTable, EXACT, LOWER, UPPER
+from my_ordering import MoveOrderer, MovePicker, is_quiet
+from my_boards import start_board, test_list, games_list
+
+# Scores are in centipawns, from the side to move's point of view. A
+# checkmate scores MATE less the number of plies to reach it, so quicker
+# mates score higher.
+MATE = 30000
+INFINITY = 32000
+MAX_PLY = 128
+MATE_BOUND = MATE - MAX_PLY
+
+# Half the width of the first aspiration window, around the score of the
+# previous iteration
+ASPIRATION_WINDOW = 50
+
+# How far below alpha the static score must be, by depth, before quiet moves
+# are pruned (futility) or the node drops straight into the quiescence
+# search (razoring)
+FUTILITY_MARGINS = [0, 200, 450]
+RAZOR_MARGINS = [0, 300, 550]
+
+PIECE_VALUES = [0, 100, 320, 330, 500, 900, 0]
+
+# History score above which a late move is not reduced
+HISTORY_KEEP = 2000
+
+# The switches of Engine that change how selective the search is
+SEARCH_OPTIONS = ['null_move', 'reductions', 'futility', 'razoring',
+                  'check_extensions']
+
+# Piece square tables: a bonus for each square, from White's side, with the
+# 8th row first like the squares of a Position. Black uses the mirrored
+# square.
+PAWN_TABLE = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+     50,  50,  50,  50,  50,  50,  50,  50,
+     10,  10,  20,  30,  30,  20,  10,  10,
+      5,   5,  10,  25,  25,  10,   5,   5,
+      0,   0,   0,  20,  20,   0,   0,   0,
+      5,  -5, -10,   0,   0, -10,  -5,   5,
+      5,  10,  10, -20, -20,  10,  10,   5,
+      0,   0,   0,   0,   0,   0,   0,   0]
+KNIGHT_TABLE = [
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20,   0,   0,   0,   0, -20, -40,
+    -30,   0,  10,  15,  15,  10,   0, -30,
+    -30,   5,  15,  20,  20,  15,   5, -30,
+    -30,   0,  15,  20,  20,  15,   0, -30,
+    -30,   5,  10,  15,  15,  10,   5, -30,
+    -40, -20,   0,   5,   5,   0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50]
+BISHOP_TABLE = [
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,  10,  10,   5,   0, -10,
+    -10,   5,   5,  10,  10,   5,   5, -10,
+    -10,   0,  10,  10,  10,  10,   0, -10,
+    -10,  10,  10,  10,  10,  10,  10, -10,
+    -10,   5,   0,   0,   0,   0,   5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20]
+ROOK_TABLE = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+      5,  10,  10,  10,  10,  10,  10,   5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+      0,   0,   0,   5,   5,   0,   0,   0]
+QUEEN_TABLE = [
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,   5,   5,   5,   0, -10,
+     -5,   0,   5,   5,   5,   5,   0,  -5,
+      0,   0,   5,   5,   5,   5,   0,  -5,
+    -10,   5,   5,   5,   5,   5,   0, -10,
+    -10,   0,   5,   0,   0,   0,   0, -10,
+    -20, -10, -10,  -5,  -5, -10, -10, -20]
+KING_TABLE = [
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+     20,  20,   0,   0,   0,   0,  20,  20,
+     20,  30,  10,   0,   0,  10,  30,  20]
+
+# The value plus bonus of each piece code on each square
+PIECE_SQUARE = [[0] * 64 for code in range(16)]
+for _piece_type, _table in ((PAWN, PAWN_TABLE), (KNIGHT, KNIGHT_TABLE),
+                            (BISHOP, BISHOP_TABLE), (ROOK, ROOK_TABLE),
+                            (QUEEN, QUEEN_TABLE), (KING, KING_TABLE)):
+    for _sq in range(64):
+        PIECE_SQUARE[piece_code(WHITE, _piece_type)][_sq] = (
+            PIECE_VALUES[_piece_type] + _table[_sq])
+        PIECE_SQUARE[piece_code(BLACK, _piece_type)][_sq] = (
+            PIECE_VALUES[_piece_type] + _table[_sq ^ 56])
+
+
+def evaluate(position):
+    """Scores a position by material and piece placement.
+
+    Args:
+        position(Position): The position.
+
+    Returns:
+        int: The score in centipawns for the side to move.
+    """
+    score = 0
+    squares = position.squares
+    for sq in squares_of(position.occupied[WHITE]):
+        score += PIECE_SQUARE[squares[sq]][sq]
+    for sq in squares_of(position.occupied[BLACK]):
+        score -= PIECE_SQUARE[squares[sq]][sq]
+    return score if position.side == WHITE else -score
+
+
+def score_to_table(score, ply):
+    """Makes a mate score count from the stored position instead of the root."""
+    if score > MATE_BOUND:
+        return score + ply
+    if score < -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    """Turns a stored mate score back into one counted from the root."""
+    if score > MATE_BOUND:
+        return score - ply
+    if score < -MATE_BOUND:
+        return score + ply
+    return score
+
+
+def score_text(score):
+    """Writes a score for people, such as '+0.35' or 'mate in 3'.
+
+    Args:
+        score(int): The score in centipawns.
+
+    Returns:
+        str: The score in pawns, or the moves to mate (negative if the side
+             to move is being mated).
+    """
+    if score > MATE_BOUND:
+        return 'mate in %d' % ((MATE - score + 1) // 2)
+    if score < -MATE_BOUND:
+        return 'mate in -%d' % ((MATE + score + 1) // 2)
+    return '%+.2f' % (score / 100)
+
+
+class SearchResult():
+    """The outcome of a search.
+
+    Args:
+        None
+
+    Attributes:
+        move(int): The best move found, or 0 if there is no legal move.
+        score(int): Its score in centipawns for the side to move.
+        pv(list): The principal variation: the best move and the best line
+                  of play expected after it.
+        depth(int): The deepest search that finished.
+        nodes(int): The number of positions searched.
+        time(float): The seconds the search took.
+    """
+
+    def __init__(self):
+        self.move = 0
+        self.score = 0
+        self.pv = []
+        self.depth = 0
+        self.nodes = 0
+        self.time = 0.0
+
+    def nps(self):
+        """Returns the nodes searched per second."""
+        return self.nodes / max(self.time, 1e-9)
+
+    def __repr__(self):
+        return ('SearchResult(depth %d, score %s, pv %s, %d nodes)'
+                % (self.depth, score_text(self.score),
+                   ' '.join(move_name(move) for move in self.pv), self.nodes))
+
+
+class Engine():
+    """Searches positions for their best move.
+
+    The transposition table and move ordering are kept from one search to
+    the next, so a search of a position close to the last one starts with
+    what was learned.
+
+    Each way of searching some moves less deeply than others can be turned
+    off, to measure what it does to the node count and the moves found.
+
+    Args:
+        hash_mb(float): The memory budget of the transposition table.
+        null_move(bool): Prune when passing the turn still fails high, unless
+                         the side to move only has pawns, as then passing
+                         could be better than any move (zugzwang).
+        reductions(bool): Search late quiet moves with less depth first (late
+                          move reductions), unless their history is good.
+        futility(bool): Skip quiet moves near the leaves when the static
+                        score is too far below alpha for them to matter.
+        razoring(bool): Go straight to the quiescence search near the leaves
+                        when the static score is far below alpha.
+        check_extensions(bool): Search one ply deeper when in check.
+        table(TranspositionTable): A table to use instead of a new one, such
+                                   as one shared with other searches.
+
+    Attributes:
+        table(TranspositionTable): Results of earlier searches.
+        ordering(MoveOrderer): Sorts the moves at each node.
+        nodes(int): The positions searched in the current search.
+        stopped(bool): True once a limit is reached, which ends the search.
+        should_stop(function): Asked now and then during a search, which
+                               stops if it returns True. None to never ask.
+        pv_table(list): The best line found from each ply, starting at the
+                        ply's own index. Row 0 is the principal variation.
+        pv_length(list): Where the line of each ply ends in its row.
+    """
+
+    def __init__(self, hash_mb = 16, null_move = True, reductions = True,
+                 futility = True, razoring = True, check_extensions = True,
+                 table = None):
+        self.null_move = null_move
+        self.reductions = reductions
+        self.futility = futility
+        self.razoring = razoring
+        self.check_extensions = check_extensions
+        self.table = table if table is not None else TranspositionTable(hash_mb)
+        self.ordering = MoveOrderer(MAX_PLY)
+        self.nodes = 0
+        self.stopped = False
+        self.should_stop = None
+        self.node_limit = None
+        self.deadline = None
+        self.pv_table = [[0] * (MAX_PLY + 2) for ply in range(MAX_PLY + 2)]
+        self.pv_length = [0] * (MAX_PLY + 2)
+
+    def search(self, position, depth = None, nodes = None, movetime = None,
+               callback = None, skip = None, age_table = True):
+        """Finds the best move of a position, deepening until a limit.
+
+        At least one limit should be given, otherwise the search goes on to
+        MAX_PLY. An iteration that is cut off by the node or time limit is
+        thrown away, and the result of the last finished one is returned.
+
+        Args:
+            position(Position): The position to search. It is changed while
+                                searching, and restored before returning.
+            depth(int): The deepest iteration, in plies. 0 searches no
+                        iteration and gives the first legal move.
+            nodes(int): Stop after about this many positions.
+            movetime(float): Stop after about this many seconds.
+            callback(function): Called with the SearchResult after each
+                                finished iteration.
+            skip(tuple): (size, phase) for a helper of a parallel search that
+                         leaves out some iterations: blocks of size
+                         iterations are searched and skipped in turn, shifted
+                         by phase. The deepest iteration is never skipped.
+                         None to search every iteration.
+            age_table(bool): Start a new search in the transposition table.
+                             Searches helping another one with the same
+                             table leave this to it.
+
+        Returns:
+            SearchResult: The best move, its score and the principal
+                          variation.
+        """
+        start = time.perf_counter()
+        self.nodes = 0
+        self.stopped = False
+        self.node_limit = nodes
+        self.deadline = start + movetime if movetime is not None else None
+        if age_table:
+            self.table.new_search()
+        self.ordering.new_search()
+
+        result = SearchResult()
+        moves = position.legal_moves()
+        if moves:
+            # Something to play even if the first iteration is cut off
+            result.move = moves[0]
+            result.pv = [moves[0]]
+        max_depth = MAX_PLY if depth is None else min(depth, MAX_PLY)
+
+        for iteration in range(1, max_depth + 1):
+            if not moves:
+                break
+            if (skip is not None and iteration < max_depth
+                and (iteration + skip[1]) // skip[0] % 2):
+                continue
+            score = self.aspiration_search(position, iteration, result.score)
+            if self.stopped:
+                break
+            result.pv = self.principal_variation()
+            result.move = result.pv[0]
+            result.score = score
+            result.depth = iteration
+            result.nodes = self.nodes
+            result.time = time.perf_counter() - start
+            if callback is not None:
+                callback(result)
+            if abs(score) > MATE_BOUND and MATE - abs(score) <= iteration:
+                # A mate was found with every reply searched
+                break
+            if (self.deadline is not None and
+                time.perf_counter() - start > (self.deadline - start) / 2):
+                # The next iteration would most likely not finish in time
+                break
+
+        if not moves:
+            result.score = -MATE if position.in_check() else 0
+        result.nodes = self.nodes
+        result.time = time.perf_counter() - start
+        return result
+
+    def aspiration_search(self, position, depth, guess):
+        """Searches the root with a window around a guessed score.
+
+        The window is widened on the side the score fell out of until the
+        score lands inside it. The first iterations and mate scores use the
+        full window.
+
+        Args:
+            position(Position): The root position.
+            depth(int): The depth of the iteration.
+            guess(int): The score of the previous iteration.
+
+        Returns:
+            int: The exact score of the root.
+        """
+        if depth < 4 or abs(guess) > MATE_BOUND:
+            return self.negamax(position, depth, -INFINITY, INFINITY, 0)
+        delta = ASPIRATION_WINDOW
+        alpha = max(guess - delta, -INFINITY)
+        beta = min(guess + delta, INFINITY)
+        while True:
+            score = self.negamax(position, depth, alpha, beta, 0)
+            if self.stopped:
+                return score
+            delta *= 2
+            if score <= alpha:
+                alpha = max(score - delta, -INFINITY)
+            elif score >= beta:
+                beta = min(score + delta, INFINITY)
+            else:
+                return score
+
+    def check_limits(self):
+        """Sets stopped once a limit is reached, or should_stop says so."""
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            self.stopped = True
+        elif self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.stopped = True
+        elif self.should_stop is not None and self.should_stop():
+            self.stopped = True
+
+    def negamax(self, position, depth, alpha, beta, ply):
+        """Searches a position to a depth with alpha-beta pruning.
+
+        Args:
+            position(Position): The position.
+            depth(int): The plies left to search.
+            alpha(int): The score the side to move is already sure of.
+            beta(int): The score the opponent won't allow it to go above.
+            ply(int): The plies from the root.
+
+        Returns:
+            int: The score for the side to move. Scores at or below alpha are
+                 an upper bound, and at or above beta a lower bound.
+        """
+        self.nodes += 1
+        self.pv_length[ply] = ply
+        if not self.nodes & 1023:
+            self.check_limits()
+        if self.stopped:
+            return 0
+        if ply and (position.halfmove >= 100 or position.repetitions()):
+            return 0
+        if ply >= MAX_PLY:
+            return evaluate(position)
+        pv_node = beta - alpha > 1
+        checked = position.in_check()
+        if checked and self.check_extensions:
+            depth += 1
+        if depth <= 0:
+            return self.quiesce(position, alpha, beta, ply)
+
+        key = position.key
+        entry = self.table.probe(key)
+        table_move = 0
+        if entry is not None:
+            table_move, score, entry_depth, bound = entry
+            if not pv_node and entry_depth >= depth:
+                score = score_from_table(score, ply)
+                if ((bound == EXACT) or (bound == LOWER and score >= beta) or
+                    (bound == UPPER and score <= alpha)):
+                    return score
+
+        # Pruning only happens off the principal variation, out of check,
+        # and when no mate score is at stake
+        prunable = (not pv_node and not checked and abs(alpha) < MATE_BOUND
+                    and abs(beta) < MATE_BOUND)
+        static = evaluate(position) if prunable else 0
+
+        if (prunable and self.razoring and depth <= 2 and
+            static + RAZOR_MARGINS[depth] <= alpha):
+            score = self.quiesce(position, alpha, beta, ply)
+            if score <= alpha:
+                return score
+
+        if (prunable and self.null_move and depth >= 3 and static >= beta and
+            position.history and position.history[-1][0] and
+            self.has_pieces(position)):
+            # Passing twice in a row would only waste the search
+            reduction = 3 if depth >= 6 else 2
+            position.make_null_move()
+            score = -self.negamax(position, depth - 1 - reduction, -beta,
+                                  -beta + 1, ply + 1)
+            position.unmake_null_move()
+            if self.stopped:
+                return 0
+            if score >= beta:
+                return beta
+
+        futile = (prunable and self.futility and depth <= 2 and
+                  static + FUTILITY_MARGINS[depth] <= alpha)
+        killers = self.ordering.killers[ply]
+        history = self.ordering.history[position.side]
+
+        start_alpha = alpha
+        best_score = -INFINITY
+        best_move = 0
+        picker = MovePicker(position, self.ordering, ply, table_move)
+        for move in picker:
+            quiet = is_quiet(move)
+            position.make_move(move)
+            late = (quiet and picker.count > 1 and move != killers[0] and
+                    move != killers[1])
+            if late and (futile or (self.reductions and depth >= 3 and
+                                    picker.count > 3 and not checked)):
+                gives_check = position.in_check()
+            else:
+                gives_check = True
+
+            if futile and late and not gives_check:
+                position.unmake_move()
+                best_score = max(best_score, static + FUTILITY_MARGINS[depth])
+                continue
+
+            if (self.reductions and depth >= 3 and picker.count > 3 and
+                late and not checked and not gives_check):
+                reduction = 1 if picker.count <= 6 else 2
+                if history[move & 4095] > HISTORY_KEEP:
+                    reduction -= 1
+                reduction = min(reduction, depth - 2)
+            else:
+                reduction = 0
+            if picker.count == 1:
+                score = -self.negamax(position, depth - 1, -beta, -alpha,
+                                      ply + 1)
+            else:
+                # Later moves only have to be shown to be no better
+                score = -self.negamax(position, depth - 1 - reduction,
+                                      -alpha - 1, -alpha, ply + 1)
+                if score > alpha and (reduction or score < beta):
+                    # It may be better than thought: search it fully
+                    score = -self.negamax(position, depth - 1, -beta, -alpha,
+                                          ply + 1)
+            position.unmake_move()
+            if self.stopped:
+                return 0
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    self.update_pv(ply, move)
+                    if alpha >= beta:
+                        self.ordering.cutoff(position, move, ply, depth)
+                        break
+        if not picker.count:
+            return -(MATE - ply) if checked else 0
+
+        if best_score >= beta:
+            bound = LOWER
+        elif best_score > start_alpha:
+            bound = EXACT
+        else:
+            bound = UPPER
+        self.table.store(key, best_move, score_to_table(best_score, ply), depth,
+                         bound)
+        return best_score
+
+    def update_pv(self, ply, move):
+        """Makes a move followed by the line below it the best line of a ply."""
+        row = self.pv_table[ply]
+        child = self.pv_table[ply + 1]
+        end = self.pv_length[ply + 1]
+        row[ply] = move
+        row[ply + 1:end] = child[ply + 1:end]
+        self.pv_length[ply] = end
+
+    def has_pieces(self, position):
+        """Returns True if the side to move has a piece besides pawns and its
+        king, so passing is unlikely to be its best move."""
+        side = position.side
+        pawns_and_king = (position.pieces[piece_code(side, PAWN)]
+                          | position.pieces[piece_code(side, KING)])
+        return (position.occupied[side] & ~pawns_and_king) != 0
+
+    def quiesce(self, position, alpha, beta, ply):
+        """Searches captures and promotions until the position is quiet.
+
+        The side to move can stand pat: stop capturing and take the static
+        score, unless it is in check, when every move is searched. Captures
+        that lose material by static exchange evaluation are skipped.
+
+        Args:
+            position(Position): The position.
+            alpha(int): The score the side to move is already sure of.
+            beta(int): The score the opponent won't allow it to go above.
+            ply(int): The plies from the root.
+
+        Returns:
+            int: The score for the side to move.
+        """
+        self.nodes += 1
+        self.pv_length[ply] = ply
+        if not self.nodes & 1023:
+            self.check_limits()
+        if self.stopped:
+            return 0
+        if ply >= MAX_PLY:
+            return evaluate(position)
+
+        checked = position.in_check()
+        if checked:
+            best_score = -INFINITY
+        else:
+            best_score = evaluate(position)
+            if best_score >= beta:
+                return best_score
+            alpha = max(alpha, best_score)
+
+        picker = MovePicker(position, self.ordering, ply,
+                            captures_only = not checked)
+        for move in picker:
+            position.make_move(move)
+            score = -self.quiesce(position, -beta, -alpha, ply + 1)
+            position.unmake_move()
+            if self.stopped:
+                return 0
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        if checked and not picker.count:
+            return -(MATE - ply)
+        return best_score
+
+    def principal_variation(self):
+        """Returns the best line of the last search from the PV table.
+
+        Returns:
+            list: The encoded moves of the line, from the root.
+        """
+        return self.pv_table[0][:self.pv_length[0]]
+
+
+def analyse(groups, depth = None, nodes = None, movetime = None, hash_mb = 16,
+            options = None):
+    """Searches the built-in boards and prints the best line of each.
+
+    Args:
+        groups(list): Any of 'start', 'tests' and 'games'.
+        depth(int): The deepest iteration.
+        nodes(int): The node limit of each search.
+        movetime(float): The time limit of each search, in seconds.
+        hash_mb(float): The memory budget of the transposition table.
+        options(dict): Switches passed on to Engine, such as
+                       {'null_move': False}, or None for none.
+
+    Returns:
+        list: The SearchResult of each board.
+    """
+    boards = []
+    if 'start' in groups:
+        boards.append([start_board, 'w', 'Start board'])
+    if 'tests' in groups:
+        boards += test_list
+    if 'games' in groups:
+        boards += games_list
+
+    options = options or {}
+    engine = Engine(hash_mb, **options)
+    results = []
+    for board, mover, info in boards:
+        position = Position.from_board(board, mover)
+        result = engine.search(position, depth, nodes, movetime)
+        results.append(result)
+        print(info.split('|')[-1].strip())
+        print('    depth %d  score %s  %d nodes in %.2f s (%.0f nps)'
+              % (result.depth, score_text(result.score), result.nodes,
+                 result.time, result.nps()))
+        print('    ' + ' '.join(move_name(move) for move in result.pv))
+    print('Total: %d nodes in %.2f s'
+          % (sum(result.nodes for result in results),
+             sum(result.time for result in results)))
+    return results
+
+
+def main(argv = None):
+    """Reads the command line and analyses the chosen boards."""
+    parser = argparse.ArgumentParser(description = 'Searches the built-in '
+                                     'boards for their best moves.')
+    parser.add_argument('--depth', type = int,
+                        help = 'deepest search, in plies')
+    parser.add_argument('--nodes', type = int,
+                        help = 'positions to search for each board')
+    parser.add_argument('--movetime', type = float,
+                        help = 'seconds to search each board')
+    parser.add_argument('--hash', type = float, default = 16,
+                        help = 'transposition table size in MB (default 16)')
+    parser.add_argument('--positions', nargs = '+', default = ['games'],
+                        choices = ['start', 'tests', 'games'],
+                        help = 'which boards to search (default games)')
+    for option in SEARCH_OPTIONS:
+        parser.add_argument('--no-' + option.replace('_', '-'),
+                            dest = option, action = 'store_false',
+                            help = 'turn off ' + option.replace('_', ' '))
+    args = parser.parse_args(argv)
+    if args.depth is None and args.nodes is None and args.movetime is None:
+        args.movetime = 5.0
+    options = {option: getattr(args, option) for option in SEARCH_OPTIONS}
+    analyse(args.positions, args.depth, args.nodes, args.movetime, args.hash,
+            options)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,15 @@
 from tkinter import Button, Label, Tk
 import numpy as np
 import random
-from my_classes import King, Queen, Rook, Knight, Bishop, Pawn
+from my_classes import PIECES
+from my_bitboards import WHITE, QUEEN, ROOK, BISHOP, KNIGHT
+from my_position import (Position, encode_move, move_source, move_target,
+    move_flags, move_promotion, move_name)
+from my_engine import score_text
+from my_worker import EngineWorker, DONE
 from my_variables import (start_board, reset_board, test_list, games_list,
-    button_array, pawn_to_queen, pawn_to_rook, pawn_to_bishop, pawn_to_knight)
+    button_array, pawn_to_queen, pawn_to_rook, pawn_to_bishop, pawn_to_knight,
+    hint_label)
 
 # This was used for testing. current_board = np.zeros((8,8))
 # current_board = np.array(current_board,dtype = object)
@@ -11,9 +17,154 @@ from my_variables import (start_board, reset_board, test_list, games_list,
 current_board = start_board
 testing_index = 0 # This is used to keep track of the current test board
 
+# The game being played. The boards in my_variables are only starting layouts;
+# whose turn it is, castling rights and en passant are kept by the position.
+current_position = Position.from_board(start_board, 'w')
+
+# The legal moves of the position on the screen. They are worked out once for
+# the whole side when it is drawn, and read back when a piece is clicked.
+# They are kept with the Zobrist key of their position.
+listed_key = None
+listed_moves = []
+
 # This determines whose turn it is
 white_moves = True
 
+# The engine searches on its own thread, so clicks never wait for it: it
+# works out a hint for the side to move when the hint button is pressed, or
+# plays a side if engine_side is set. Its answers are collected every
+# ENGINE_POLL_MS milliseconds while a search is wanted. After playing, it
+# ponders the reply it expects, on the player's time.
+ENGINE_MOVETIME = 3.0
+ENGINE_POLL_MS = 100
+engine_worker = None
+engine_side = None # The color the engine plays, or None
+engine_task = None # 'hint' or 'move' until the newest search is done
+engine_position = None # The position the engine is to move in
+engine_polling = False # True while a poll is scheduled
+pondering_from = None # Key of the position the engine is pondering in
+
+
+def legal_move_list(position):
+    """Returns the legal moves of a position, reusing the last list if unchanged.
+    
+    Args:
+        position(Position): The position.
+        
+    Returns:
+        list: The encoded legal moves of the side to move.
+    """
+    global listed_key, listed_moves
+    if position.key != listed_key:
+        listed_key = position.key
+        listed_moves = position.legal_moves()
+    return listed_moves
+
+
+def start_engine(task, delay = ENGINE_POLL_MS):
+    """Starts polling the engine for a task, unless already polling.
+
+    Args:
+        task(str): 'hint' or 'move'.
+        delay(int): Milliseconds until the first poll.
+    """
+    global engine_worker, engine_task, engine_polling
+    if engine_worker is None:
+        engine_worker = EngineWorker()
+    engine_task = task
+    hint_label.config(text = 'Engine thinking...')
+    hint_label.grid(row = 12, columnspan = 8)
+    if not engine_polling:
+        engine_polling = True
+        hint_label.after(delay, poll_engine)
+
+
+def request_hint(position):
+    """Starts the engine on a hint for a position, replacing any older one.
+
+    Args:
+        position(Position): The position on the screen.
+    """
+    start_engine('hint')
+    engine_worker.submit(position, movetime = ENGINE_MOVETIME)
+
+
+def request_move(position):
+    """Has the engine find its move in a position.
+
+    If the engine pondered this position, its search goes on, and the move
+    is played as soon as it is done.
+
+    Args:
+        position(Position): The position on the screen, which the engine's
+                            move is made in.
+    """
+    global engine_position
+    engine_position = position
+    if engine_worker is not None and engine_worker.ponderhit(position):
+        start_engine('move', 0)
+    else:
+        start_engine('move')
+        engine_worker.submit(position, movetime = ENGINE_MOVETIME)
+
+
+def cancel_engine():
+    """Stops the engine and clears the hint."""
+    global engine_task, pondering_from
+    engine_task = None
+    pondering_from = None
+    if engine_worker is not None:
+        engine_worker.cancel()
+    hint_label.config(text = '')
+
+
+def play_engine_move(result):
+    """Plays the engine's move, and starts pondering the expected reply.
+
+    Args:
+        result(SearchResult): The engine's search of engine_position.
+    """
+    global pondering_from
+    position = engine_position
+    position.make_move(result.move)
+    if len(result.pv) > 1:
+        pondering_from = position.key
+        engine_worker.ponder(position, result.pv[1], movetime = ENGINE_MOVETIME)
+    draw(position)
+    hint_label.config(text = 'Engine played %s (%s, depth %d)'
+                      % (move_name(result.move), score_text(result.score),
+                         result.depth))
+
+
+def poll_engine():
+    """Shows what the engine has found so far, plays its move when it is
+    done, and polls again until then."""
+    global engine_task, engine_polling
+    engine_polling = False
+    for kind, result in engine_worker.poll():
+        if engine_task == 'hint':
+            hint_label.config(text = 'Hint: %s (%s, depth %d)'
+                              % (move_name(result.move),
+                                 score_text(result.score), result.depth))
+            if kind == DONE:
+                engine_task = None
+        elif engine_task == 'move' and kind == DONE:
+            engine_task = None
+            play_engine_move(result)
+    if engine_task is not None and not engine_polling:
+        engine_polling = True
+        hint_label.after(ENGINE_POLL_MS, poll_engine)
+
+
+def toggle_engine():
+    """Has the engine play the side to move from now on, or stop playing."""
+    global engine_side
+    if engine_side is None:
+        engine_side = current_position.side
+    else:
+        engine_side = None
+    draw()
+
 
 def reset_board(set_board = [[reset_board, 'w', '']], board = current_board, screen = '', test_iter = False):
     """Resets the current board.
@@ -41,14 +192,11 @@ def reset_board(set_board = [[reset_board, 'w', '']], board = current_board, scr
 
     mover = rand_board[1]
     game_info = rand_board[2]
-    current_board = board
 
-    # Resets the number of moves each piece has made to 0
-    for rw in range(8):
-        for cl in range(8):
-            current_board[rw,cl] = board[rw,cl]
-            if current_board[rw,cl] != 0:
-                current_board[rw,cl].moves = 0
+    # Starts a new position from the layout. The layout itself is never
+    # changed, so it can be reset to again later.
+    global current_position
+    current_position = Position.from_board(board, mover)
     
     # Hides pawn promotion buttons in case board is reset during pawn promotion
     pawn_to_queen.grid_forget()
@@ -70,7 +218,7 @@ def reset_board(set_board = [[reset_board, 'w', '']], board = current_board, scr
                           font = ('Arial', 12))
     message_label.grid(row = 9, columnspan = 8)
     
-    draw(board) # Draws the new board
+    draw(current_position) # Draws the new board
     
     # If there is a message to print, this makes sure it gets printed
     if game_info != '':
@@ -83,14 +231,17 @@ def reset_board(set_board = [[reset_board, 'w', '']], board = current_board, scr
         message_label.grid(row = 9, columnspan = 8)
 
 
-def promote(rw, cl, promotion,board = current_board):
+def promote(rw, cl, promotion, position = None):
     """Promotes a pawn and draws the new board.
     
     Args:
         rw(int): The row where the pawn is located.
         cl(int): The column where the pawn is located.
-        board(numpy array): The current board layout.
+        promotion(str): The piece to promote to ('q', 'r', 'bi' or 'n').
+        position(Position): The current position, defaults to the game's.
     """
+    if position is None:
+        position = current_position
     
     # Hides the buttons when one is pressed
     pawn_to_queen.grid_forget()
@@ -98,104 +249,75 @@ def promote(rw, cl, promotion,board = current_board):
     pawn_to_bishop.grid_forget()
     pawn_to_knight.grid_forget()
     
-    # Replaces the pawn with the chosen piece, keeping the color the same
-    if promotion == 'q':
-        board[rw, cl] = Queen(board[rw, cl].color)
-    elif promotion == 'r':
-        board[rw, cl] = Rook(board[rw, cl].color)
-    elif promotion == 'bi':
-        board[rw, cl] = Bishop(board[rw, cl].color)
-    elif promotion == 'n':
-        board[rw, cl] = Knight(board[rw, cl].color)
+    # The pawn move was played as a queen promotion while waiting for the
+    # choice. It is taken back and played again with the chosen piece, keeping
+    # the color the same.
+    move = position.unmake_move()
+    piece_types = {'q': QUEEN, 'r': ROOK, 'bi': BISHOP, 'n': KNIGHT}
+    position.make_move(encode_move(move_source(move), move_target(move),
+                                   move_flags(move), piece_types[promotion]))
     
     message_label = Label(text = ('                                           '
                                   + '                                         '
                                   + '                                '))
     message_label.grid(row = 9, columnspan = 8)
                           
-    draw(board)
+    draw(position)
 
 
-def move_to(from_rw, from_cl, to_rw, to_cl, board = current_board, drw = True):
+def move_to(from_rw, from_cl, to_rw, to_cl, position = None, drw = True):
     """Moves a piece on the board.
     
+    Castling moves the rook as well, en passant removes the captured pawn, and
+    the castling rights and en passant square of the position are updated by
+    the move itself.
+    
     Args:
         from_rw(int): The original row of the piece.
         from_cl(int): The original column of the piece.
         to_rw(int): The new row of the piece.
         to_cl(int): The new row of the piece.
-        board(numpy array): The current board layout.
-        drw(bool): Draws the board if True, returns the board array otherwise.
+        position(Position): The current position, defaults to the game's.
+        drw(bool): Draws the board if True, returns the position otherwise.
         
     Returns:
-        board(numpy array): The updated board layout after the move is made.
+        position(Position): The updated position after the move is made. It
+                            is left unchanged if there is no legal move between
+                            the two squares.
     """
-    board[to_rw, to_cl] = board[from_rw, from_cl] # Copies piece to new position
-    board[from_rw, from_cl] = 0 # Sets old position to 0
+    if position is None:
+        position = current_position
+    frm = from_rw*8 + from_cl
+    to = to_rw*8 + to_cl
+    
+    # Finds the legal move between the two squares. A pawn reaching the last
+    # row is promoted to a queen until another piece is chosen.
+    for move in legal_move_list(position):
+        if ((move_source(move) == frm) and (move_target(move) == to) and
+            (move_promotion(move) in (0, QUEEN))):
+            break
+    else:
+        # There is no legal move between the squares, so nothing is played
+        return None if drw else position
+    position.make_move(move)
     disable_board = False # Sets all buttons to be able to be pressed
     
     # If a pawn made it across, disables board, and enables promote buttons
-    if ((to_rw == 0) or (to_rw == 7)) and (board[to_rw, to_cl].piece == 'p'):
+    if move_promotion(move):
         pawn_to_queen.configure(command = lambda to_rw = to_rw, to_cl = to_cl:
-                              promote(to_rw, to_cl,'q', board))
+                              promote(to_rw, to_cl,'q', position))
         pawn_to_queen.grid(row = 10, column = 0)
         pawn_to_rook.configure(command = lambda to_rw = to_rw, to_cl = to_cl:
-                             promote(to_rw, to_cl,'r', board))
+                             promote(to_rw, to_cl,'r', position))
         pawn_to_rook.grid(row = 10, column = 1)
         pawn_to_bishop.configure(command = lambda to_rw = to_rw, to_cl = to_cl:
-                               promote(to_rw, to_cl,'bi', board))
+                               promote(to_rw, to_cl,'bi', position))
         pawn_to_bishop.grid(row = 10, column = 2)
         pawn_to_knight.configure(command = lambda to_rw = to_rw, to_cl = to_cl:
-                               promote(to_rw, to_cl,'n', board))
+                               promote(to_rw, to_cl,'n', position))
         pawn_to_knight.grid(row = 10, column = 3)
         disable_board = True
     
-    # If the king is castleing left, sets the rook to the right place
-    if ((board[to_rw, to_cl] != 0) and
-        (board[to_rw, to_cl].piece == 'k') and
-        (board[to_rw, to_cl].moves == 0) and
-        (to_cl == 2)):
-        board[to_rw, 3] = board[to_rw,0]
-        board[to_rw,0] = 0
-    
-    # King castling right
-    if ((board[to_rw, to_cl] != 0) and
-        (board[to_rw, to_cl].piece == 'k') and
-        (board[to_rw, to_cl].moves == 0) and
-        (to_cl == 6)):
-        board[to_rw,5] = board[to_rw, 7]
-        board[to_rw, 7] = 0
-        
-    # Deletes the appropriate pawn if a pawn is attacking En passant.
-    if ((board[to_rw, to_cl] != 0) and
-        (board[to_rw, to_cl].piece != 0) and
-        (board[to_rw, to_cl].piece == 'p') and
-        ((to_rw == 2) or (to_rw == 5))):
-        if ((board[to_rw, to_cl].color == 'b') and
-            (board[to_rw-1, to_cl] != 0) and
-            (board[to_rw-1, to_cl].piece == 'p') and
-            (board[to_rw-1, to_cl].justmoved)):
-            board[to_rw-1, to_cl]=0
-        elif ((board[to_rw, to_cl].color == 'w') and
-              (board[to_rw+1, to_cl] != 0) and
-              (board[to_rw+1, to_cl].piece == 'p') and
-              (board[to_rw+1, to_cl].justmoved)):
-            board[to_rw+1, to_cl]=0
-    
-    # Adds 1 to the move counter for the piece
-    if (board[to_rw, to_cl] != 0):
-        board[to_rw, to_cl].moves += 1
-    
-    # Sets all pieces .justmoved method to False
-    for irw in range(8):
-        for icl in range(8):
-            if board[irw, icl] != 0:
-                board[irw, icl].justmoved = False
-        
-    # Sets the moved piece .justmoved method to True
-    if (board[to_rw, to_cl] != 0):
-        board[to_rw, to_cl].justmoved = True
-    
     # If the input drw is set to True (True by default), display the board
     if drw:
     # Hides previously written text
@@ -204,29 +326,31 @@ def move_to(from_rw, from_cl, to_rw, to_cl, board = current_board, drw = True):
                                       + '                                             '),
                               font = ('Arial', 12))
         message_label.grid(row = 9, columnspan = 8)
-        global white_moves
-        white_moves = not white_moves
-        draw(board,disabled_buttons = disable_board)
+        draw(position, disabled_buttons = disable_board)
         
         # Pawn promo message if conditions are met
-        if ((to_rw == 0) or (to_rw == 7)) and (board[to_rw, to_cl].piece == 'p'):
+        if move_promotion(move):
             message_label = Label(text = 'Promote your pawn.',
                                  font = ('Arial',12))
             message_label.grid(row = 9, columnspan = 8)
     else:
-        return board
+        return position
 
     
-def show_moves(rw, cl, board = current_board):
+def show_moves(rw, cl, position = None):
     """Shows the available legal moves when a piece is selected.
     
     Args:
         rw(int): The row of the selected piece.
         cl(int): The column of the selected piece.
-        board(numpy array): The board layout on which the piece resides.
+        position(Position): The current position, defaults to the game's.
     """
-    legal_moves = (board[rw, cl].legal_moves(rw, cl, board)
-                  + board[rw, cl].legal_takes(rw, cl, board))
+    if position is None:
+        position = current_position
+    legal_moves = 0
+    for move in legal_move_list(position):
+        if move_source(move) == rw*8 + cl:
+            legal_moves |= 1 << move_target(move)
     from_rw = rw
     from_cl = cl
     
@@ -236,14 +360,16 @@ def show_moves(rw, cl, board = current_board):
             button_state = 'normal'
             if (rw + cl) % 2 == 1:
                 bg_color = 'lightgray' # Sets every other square gray
-            if legal_moves[rw, cl] == 0: # Disable spots that can't be moved to
+            is_legal = legal_moves & (1 << (rw*8 + cl))
+            if not is_legal: # Disable spots that can't be moved to
                 button_state = 'disabled'
-            if board[rw, cl] == 0: # Empty symbol for spaces w/o pieces
+            code = position.squares[rw*8 + cl]
+            if code == 0: # Empty symbol for spaces w/o pieces
                 symbol = ''
             else:
-                symbol = board[rw, cl].sym # sets unicode symbol
+                symbol = PIECES[code].sym # sets unicode symbol
             
-            if legal_moves[rw, cl] != 0: # Set legal move buttons to green
+            if is_legal: # Set legal move buttons to green
                 bg_color = 'green'
                 
             
@@ -253,29 +379,41 @@ def show_moves(rw, cl, board = current_board):
             button_array[rw, cl].config(command = lambda from_rw = from_rw,
                                        from_cl = from_cl,
                                        rw = rw,
-                                       cl = cl: move_to(from_rw, from_cl, rw, cl),
+                                       cl = cl: move_to(from_rw, from_cl, rw, cl,
+                                                        position),
                                        state = button_state, text = symbol,
                                        bg = bg_color, width = 3,
                                        height = 1, font = ('Arial', 30))
             button_array[rw, cl].grid(row = rw, column = cl) # Places button
             
 
-def draw(board = current_board, disabled_buttons = False, screen = ''):
-    """Displays the given board onto the screen.
+def draw(position = None, disabled_buttons = False, screen = ''):
+    """Displays the given position onto the screen.
     
     Args:
-        board(numpy array): The board which is to be displayed.
+        position(Position): The position to display, defaults to the game's.
         disabled_buttons(bool): Disables the board if True.
         screen(Tkinter window)
     """
+    if position is None:
+        position = current_position
 
-    for irw in range(8):
-        for icl in range(8):
-            current_board[irw,icl] = board[irw,icl]
+    # Keeps the global turn in step with the position being shown
+    global white_moves
+    white_moves = (position.side == WHITE)
             
+    # All the legal moves are generated once, and every piece that starts one
+    # of them can be clicked
+    movable = 0
+    for move in legal_move_list(position):
+        movable |= 1 << move_source(move)
+    
     # Variable that stores whether any pieces of the current color can move
-    no_moves = True
-    checked = False
+    no_moves = (movable == 0)
+    checked = position.in_check()
+
+    # The player can't move the engine's pieces
+    engine_turn = (engine_side == position.side)
     
     if white_moves:
         mover = 'White'
@@ -284,12 +422,6 @@ def draw(board = current_board, disabled_buttons = False, screen = ''):
 
     message = mover + "'s Turn"
     
-    # Initializing the king's background color, row, and column as values that
-    # they can't be ultimately to help with implementation and finding errors.
-    king_bg_color = 'black'
-    king_rw = 10
-    king_cl = 10
-    
     for rw in range(8):
     
         for cl in range(8):
@@ -297,39 +429,20 @@ def draw(board = current_board, disabled_buttons = False, screen = ''):
             button_state = 'disabled'
             if (rw + cl) % 2 == 1:
                 bg_color = 'lightgray' # Setting bg gray for appropriate buttons
-            if board[rw, cl] == 0:
-                button_state = 'disabled' # Disabling buttons with no piece
-            elif ((board[rw, cl].color == 'w') == white_moves):
-                if board[rw, cl].can_move(rw, cl, board):
-                    button_state = 'normal' # Enabling pieces that can move
-                    no_moves = False # State of no_moves changes
-                    # If the king has already been set as red (check & no moves)
-                    # but a move is found now, this sets the king back to orange
-                    # which represents the king being in check, but not mate
-                    if king_bg_color == 'lightpink':
-                        king_bg_color = 'orange'
-                # Set the king background to orange if in check.
-                if ((board[rw, cl].piece == 'k') and
-                    (board[rw, cl].check(rw, cl, rw, cl, board) == 0)):
-                    king_bg_color = 'orange'
-                    king_rw = rw
-                    king_cl = cl
-                    # Set the king background to light pink if there are also no
-                    # moves available to get out of check.
-                    if no_moves:
-                        king_bg_color = 'lightpink'
-                        checked = True
+            code = position.squares[rw*8 + cl]
+            if movable & (1 << (rw*8 + cl)):
+                button_state = 'normal' # Enabling pieces that can move
             # Sets the button symbol to empty if no piece on that spot.
-            if board[rw, cl] == 0:
+            if code == 0:
                 symbol = ''
             else:
-                symbol = board[rw, cl].sym 
-            if disabled_buttons:
+                symbol = PIECES[code].sym
+            if disabled_buttons or engine_turn:
                 button_state = 'disabled'
                 
             # Creates each button, passing through row and column.
             button_array[rw, cl].config(command = lambda rw = rw,
-                                       cl = cl: show_moves(rw, cl, board),
+                                       cl = cl: show_moves(rw, cl, position),
                                        text = symbol, bg = bg_color,
                                        width = 3, height = 1,
                                        font = ('Arial', 30),
@@ -337,10 +450,15 @@ def draw(board = current_board, disabled_buttons = False, screen = ''):
             # Adds the button to the GUI
             button_array[rw, cl].grid(row = rw, column = cl)
         
-    # King_rw is initialized as 10 and will only be changed if the background
-    # color also changes to either orange or light pink. This will update the
-    # buttons to reflect the changes.
-    if king_rw != 10:
+    # Set the king background to orange if in check, or light pink if there
+    # are also no moves available to get out of check.
+    king_sq = position.king_square(position.side)
+    if checked and (king_sq >= 0):
+        king_rw, king_cl = divmod(king_sq, 8)
+        if no_moves:
+            king_bg_color = 'lightpink'
+        else:
+            king_bg_color = 'orange'
         button_array[king_rw,king_cl].config(bg = king_bg_color)
         button_array[king_rw,king_cl].grid(row = king_rw, column = king_cl)
     
@@ -354,9 +472,23 @@ def draw(board = current_board, disabled_buttons = False, screen = ''):
                             height = 4, width = 8,
                           command = lambda games = test_list: reset_board(games, test_iter = True))
 
+    engine_button = Button(text ='CPU', font = ('Arial', 10),
+                           height = 4, width = 8,
+                           command = lambda: toggle_engine())
+
+    # Hints are only worked out when asked for, on the player's turn
+    hint_state = 'normal'
+    if no_moves or disabled_buttons or engine_turn:
+        hint_state = 'disabled'
+    hint_button = Button(text ='Hint', font = ('Arial', 10),
+                         height = 2, width = 8, state = hint_state,
+                         command = lambda: request_hint(position))
+
     reset_button.grid(row = 10, column = 7) # Adds the reset button
     shuffle_button.grid(row = 10, column = 6) # Adds the shuffle button
     testing_button.grid(row = 10, column = 5) # Adds the testing button
+    engine_button.grid(row = 10, column = 4) # Adds the engine button
+    hint_button.grid(row = 11, column = 7) # Adds the hint button
             
     if no_moves:
         if white_moves:
@@ -371,4 +503,13 @@ def draw(board = current_board, disabled_buttons = False, screen = ''):
                 message = 'Draw by stalemate. Black has no legal moves left.'
         
     message_label = Label(text = message, font = ('Arial',12))
-    message_label.grid(row = 9, columnspan = 8)
\ No newline at end of file
+    message_label.grid(row = 9, columnspan = 8)
+
+    # A new board makes any search being worked out stale, except for the
+    # engine pondering while the player thinks
+    if no_moves or disabled_buttons:
+        cancel_engine()
+    elif engine_turn:
+        request_move(position)
+    elif pondering_from != position.key:
+        cancel_engine()
\ No newline at end of file
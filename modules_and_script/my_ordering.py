@@ -0,0 +1,214 @@
+"""Move ordering for the search.
+
+Alpha-beta prunes the most when the best move is tried first. The best
+guesses are the move from the transposition table, then captures and
+promotions by what they win, then quiet moves that caused cutoffs before, at
+the same ply (killers), in reply to the same move (counter-moves) or
+anywhere (history). MoveOrderer remembers those cutoffs.
+
+MovePicker hands the moves of a node to the search in that order, one stage
+at a time, and only generates a stage once the ones before it are used up.
+When the table move or a good capture cuts off, the quiet moves are never
+generated at all.
+"""
+from my_position import CAPTURE, EN_PASSANT
+from my_see import SEE_VALUES, see
+
+# History scores are halved once one reaches this
+HISTORY_LIMIT = 1 << 20
+
+# Stages of MovePicker, in the order they are played
+TABLE_MOVE = 0
+GOOD_CAPTURES = 1
+KILLERS = 2
+QUIET_MOVES = 3
+BAD_CAPTURES = 4
+DONE = 5
+
+
+def is_quiet(move):
+    """Returns True if a move neither captures nor promotes."""
+    return not (((move >> 12) & (CAPTURE | EN_PASSANT)) or (move >> 16))
+
+
+def mvv_lva(position, move):
+    """Scores a capture or promotion: Most Valuable Victim, Least Valuable
+    Attacker.
+
+    Args:
+        position(Position): The position before the move.
+        move(int): An encoded capture or promotion.
+
+    Returns:
+        int: Higher for bigger victims, then for smaller attackers.
+    """
+    attacker = position.squares[move & 63] & 7
+    if (move >> 12) & EN_PASSANT:
+        victim = 1
+    else:
+        victim = position.squares[(move >> 6) & 63] & 7
+    score = victim * 8 - attacker
+    if move >> 16:
+        # A promotion wins the new piece, less the pawn
+        score += ((move >> 16) - 1) * 8
+    return score
+
+
+class MoveOrderer():
+    """Learns from the cutoffs the search reports which quiet moves to try
+    first.
+
+    Args:
+        max_ply(int): The deepest ply that needs killer moves.
+
+    Attributes:
+        killers(list): Two quiet moves for each ply that caused cutoffs there.
+        counters(list): The quiet move that last refuted each move, indexed
+                        by the refuted move's from and to squares.
+        history(list): For each side, a score for each from and to square,
+                       raised by every cutoff a quiet move causes.
+    """
+
+    def __init__(self, max_ply):
+        self.killers = [[0, 0] for ply in range(max_ply + 1)]
+        self.counters = [0] * 4096
+        self.history = [[0] * 4096, [0] * 4096]
+
+    def new_search(self):
+        """Forgets the killers, and halves the history so newer cutoffs
+        count more."""
+        for killer in self.killers:
+            killer[0] = killer[1] = 0
+        for table in self.history:
+            for i in range(4096):
+                table[i] >>= 1
+
+    def previous_move(self, position):
+        """Returns the move that led to the position, or 0."""
+        return position.history[-1][0] if position.history else 0
+
+    def cutoff(self, position, move, ply, depth):
+        """Learns from a move that caused a beta cutoff.
+
+        Only quiet moves are remembered, as captures are already tried
+        early.
+
+        Args:
+            position(Position): The position the move was made from.
+            move(int): The move.
+            ply(int): The plies from the root.
+            depth(int): The plies that were left to search.
+        """
+        if not is_quiet(move):
+            return
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.counters[self.previous_move(position) & 4095] = move
+        table = self.history[position.side]
+        table[move & 4095] += depth * depth
+        if table[move & 4095] >= HISTORY_LIMIT:
+            for i in range(4096):
+                table[i] >>= 1
+
+
+class MovePicker():
+    """Hands out the legal moves of a node in stages, best guess first.
+
+    The stages are the table move, captures and promotions that don't lose
+    material (by MVV-LVA), the killers and counter-move, the other quiet
+    moves (by history), and last the captures that lose material. For the
+    quiescence search, only the table move and good captures are played.
+
+    Args:
+        position(Position): The position. It must not change while its
+                            moves are being picked, except for moves made
+                            and taken back in between.
+        ordering(MoveOrderer): The killers, counter-moves and history.
+        ply(int): The plies from the root.
+        table_move(int): The move from the transposition table, or 0.
+        captures_only(bool): Only pick good captures and promotions.
+
+    Attributes:
+        stage(int): The stage the last picked move came from.
+        count(int): The number of moves picked so far.
+    """
+
+    def __init__(self, position, ordering, ply, table_move = 0,
+                 captures_only = False):
+        self.position = position
+        self.ordering = ordering
+        self.ply = ply
+        self.table_move = table_move
+        self.captures_only = captures_only
+        self.stage = TABLE_MOVE
+        self.count = 0
+        self.checks = None
+
+    def is_legal(self, move):
+        """Checks a move from the table or the killers against this position."""
+        if self.checks is None:
+            self.checks = self.position.check_and_pins()
+        check_mask, pins = self.checks
+        return move in self.position.legal_moves_from(move & 63, check_mask,
+                                                      pins)
+
+    def __iter__(self):
+        position = self.position
+        table_move = self.table_move
+        if table_move and self.is_legal(table_move):
+            if not (self.captures_only and is_quiet(table_move)):
+                self.stage = TABLE_MOVE
+                self.count += 1
+                yield table_move
+
+        # Captures lose material only when the victim is worth less than
+        # the attacker, so SEE is only needed for those
+        good = []
+        bad = []
+        for move in position.iter_legal_moves(quiet = False):
+            if move == table_move:
+                continue
+            victim = (SEE_VALUES[1] if (move >> 12) & EN_PASSANT
+                      else SEE_VALUES[position.squares[(move >> 6) & 63] & 7])
+            if (victim >= SEE_VALUES[position.squares[move & 63] & 7]
+                or see(position, move) >= 0):
+                good.append(move)
+            else:
+                bad.append(move)
+        good.sort(key = lambda move: mvv_lva(position, move), reverse = True)
+        self.stage = GOOD_CAPTURES
+        for move in good:
+            self.count += 1
+            yield move
+        if self.captures_only:
+            self.stage = DONE
+            return
+
+        ordering = self.ordering
+        killers = ordering.killers[self.ply]
+        counter = ordering.counters[ordering.previous_move(position) & 4095]
+        played = [table_move]
+        self.stage = KILLERS
+        for move in (killers[0], killers[1], counter):
+            if move and move not in played and self.is_legal(move):
+                played.append(move)
+                self.count += 1
+                yield move
+
+        quiets = [move for move in position.iter_legal_moves(tactical = False)
+                  if move not in played]
+        history = ordering.history[position.side]
+        quiets.sort(key = lambda move: history[move & 4095], reverse = True)
+        self.stage = QUIET_MOVES
+        for move in quiets:
+            self.count += 1
+            yield move
+
+        bad.sort(key = lambda move: mvv_lva(position, move), reverse = True)
+        self.stage = BAD_CAPTURES
+        for move in bad:
+            self.count += 1
+            yield move
+        self.stage = DONE
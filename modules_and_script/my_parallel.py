@@ -0,0 +1,304 @@
+"""Parallel search: several workers search the same position at once.
+
+This is Lazy SMP. Every worker runs an ordinary Engine search from the root,
+but they all share one transposition table. What one worker stores, the
+others find, so together they reach each depth sooner than one alone.
+Each helper leaves out its own pattern of iterations, in blocks of one to
+four depths (skip blocks), so that added helpers are at different depths
+and don't all search the same tree in step. The main process searches too,
+and the deepest finished result of any of them is the answer.
+
+On a free-threaded Python (built without the GIL) the helpers are threads,
+which share the table, position and everything else without pickling. On
+other builds threads can't run at once, so the helpers are processes and the
+table lives in a multiprocessing shared_memory block.
+
+The table needs no locks: an entry only matches when both its words were
+written together (see my_transposition). Time to depth over the game
+positions can be measured for different numbers of workers with:
+
+    python my_parallel.py --depth 6 --workers 1 2 4 --backend both
+"""
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from my_engine import Engine
+from my_position import Position
+from my_transposition import TranspositionTable, table_bytes
+from my_perft import count_workers, default_backend, gil_disabled
+from my_boards import start_board, games_list
+
+# Bytes at the start of the shared block before the table. The first one is
+# set to stop every helper.
+HEADER_BYTES = 64
+
+# Depth of the search that starts the helpers before a benchmark is timed
+WARM_UP_DEPTH = 3
+
+# Skip blocks of the helpers, in turn: helper i leaves out the iterations
+# whose depth plus SKIP_PHASE[i], divided by SKIP_SIZE[i], is odd
+SKIP_SIZE = [1, 1, 2, 2, 2, 2, 3, 3, 3, 3, 3, 3, 4, 4, 4, 4, 4, 4, 4, 4]
+SKIP_PHASE = [0, 1, 0, 1, 2, 3, 0, 1, 2, 3, 4, 5, 0, 1, 2, 3, 4, 5, 6, 7]
+
+# The block this worker process is attached to and its engine, by block
+# name. A pool only ever searches for one block, but a process attached to
+# an older one lets go of it when a new one comes.
+attached = {}
+
+
+def helper_skip(helper):
+    """Returns the skip block (size, phase) of a helper, numbered from 1."""
+    i = (helper - 1) % len(SKIP_SIZE)
+    return SKIP_SIZE[i], SKIP_PHASE[i]
+
+
+def detach(name):
+    """Closes this process's handle on a shared block and drops its engine.
+
+    Args:
+        name(str): The name of the block.
+    """
+    shared, engine = attached.pop(name)
+    engine.table.release()
+    shared.close()
+
+
+def search_worker(task):
+    """Searches a position in a helper process, using the shared table.
+
+    Args:
+        task(list): [block name, table megabytes, packed position, its undo
+                    history, depth, nodes, movetime, skip block, table age].
+
+    Returns:
+        SearchResult: The result of the helper's search.
+    """
+    (name, megabytes, data, history, depth, nodes, movetime, skip,
+     age) = task
+    if name not in attached:
+        for old in list(attached):
+            detach(old)
+        shared = shared_memory.SharedMemory(name = name)
+        table = TranspositionTable(megabytes, shared.buf[HEADER_BYTES:])
+        engine = Engine(table = table)
+        engine.should_stop = lambda: shared.buf[0] != 0
+        attached[name] = (shared, engine)
+    shared, engine = attached[name]
+
+    position = Position.from_bytes(data)
+    position.history = history
+    # Each process has its own copy of the table's age
+    engine.table.age = age
+    return engine.search(position, depth, nodes, movetime,
+                         skip = skip, age_table = False)
+
+
+def thread_worker(engine, position, depth, nodes, movetime, skip):
+    """Searches a position in a helper thread.
+
+    Args:
+        engine(Engine): The helper's engine, sharing the main table.
+        position(Position): The helper's own copy of the position, as the
+                            main search makes moves on the original.
+        depth(int): The deepest iteration.
+        nodes(int): The node limit.
+        movetime(float): The time limit, in seconds.
+        skip(tuple): The helper's skip block, (size, phase).
+
+    Returns:
+        SearchResult: The result of the helper's search.
+    """
+    return engine.search(position, depth, nodes, movetime, skip = skip,
+                         age_table = False)
+
+
+class ParallelSearch():
+    """Searches positions with several workers sharing one table.
+
+    Close it when done, or use it in a with statement, so the workers end
+    and any shared memory is freed.
+
+    Args:
+        workers(int): The number of workers searching, the main one
+                      included, or 0 or None for one per core.
+        hash_mb(float): The memory budget of the shared table.
+        backend(str): 'threads' or 'processes', or None for threads only
+                      when the GIL is disabled.
+
+    Attributes:
+        workers(int): The number of workers searching.
+        backend(str): 'threads' or 'processes'.
+        shared(SharedMemory): The block holding the stop flag and the table,
+                              for processes only.
+        table(TranspositionTable): The shared table.
+        engine(Engine): The search of the main process.
+        helpers(list): The engines of the helper threads.
+    """
+
+    def __init__(self, workers = None, hash_mb = 16, backend = None):
+        self.workers = count_workers(workers)
+        self.hash_mb = hash_mb
+        self.backend = backend or default_backend()
+        self.shared = None
+        self.helpers = []
+        self.pool = None
+        if self.backend == 'threads':
+            self.table = TranspositionTable(hash_mb)
+            self.stop_event = threading.Event()
+            for helper in range(1, self.workers):
+                engine = Engine(table = self.table)
+                engine.should_stop = self.stop_event.is_set
+                self.helpers.append(engine)
+            if self.workers > 1:
+                self.pool = ThreadPoolExecutor(max_workers = self.workers - 1)
+        else:
+            self.shared = shared_memory.SharedMemory(
+                create = True, size = HEADER_BYTES + table_bytes(hash_mb))
+            self.table = TranspositionTable(hash_mb,
+                                            self.shared.buf[HEADER_BYTES:])
+            if self.workers > 1:
+                self.pool = ProcessPoolExecutor(max_workers = self.workers - 1)
+        self.engine = Engine(table = self.table)
+
+    def search(self, position, depth = None, nodes = None, movetime = None,
+               callback = None):
+        """Finds the best move of a position with every worker.
+
+        The limits apply to each worker. Once the main search finishes,
+        the helpers are told to stop, and they return their last finished
+        iteration.
+
+        Args:
+            position(Position): The position to search.
+            depth(int): The deepest iteration, in plies.
+            nodes(int): Stop each worker after about this many positions.
+            movetime(float): Stop after about this many seconds.
+            callback(function): Called with the main search's SearchResult
+                                after each of its iterations.
+
+        Returns:
+            SearchResult: The deepest result, the main search's if several
+                          are as deep, with the nodes of every worker.
+        """
+        start = time.perf_counter()
+        # The main search starts the new search in the table before any
+        # helper stores in it
+        self.table.new_search()
+        futures = []
+        if self.backend == 'threads':
+            self.stop_event.clear()
+            for helper, engine in enumerate(self.helpers, 1):
+                own = position.copy()
+                own.history = list(position.history)
+                futures.append(self.pool.submit(thread_worker, engine, own,
+                                                depth, nodes, movetime,
+                                                helper_skip(helper)))
+        else:
+            self.shared.buf[0] = 0
+            data = position.to_bytes()
+            history = list(position.history)
+            for helper in range(1, self.workers):
+                task = [self.shared.name, self.hash_mb, data, history, depth,
+                        nodes, movetime, helper_skip(helper), self.table.age]
+                futures.append(self.pool.submit(search_worker, task))
+
+        result = self.engine.search(position, depth, nodes, movetime, callback,
+                                    age_table = False)
+        if self.backend == 'threads':
+            self.stop_event.set()
+        else:
+            self.shared.buf[0] = 1
+        results = [result] + [future.result() for future in futures]
+        best = max(results, key = lambda result: result.depth)
+        best.nodes = sum(result.nodes for result in results)
+        best.time = time.perf_counter() - start
+        return best
+
+    def clear(self):
+        """Empties the shared table, so the next search learns nothing from
+        the earlier ones through it."""
+        self.table.clear()
+
+    def close(self):
+        """Ends the workers and frees any shared memory."""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        if self.shared is not None:
+            self.table.release()
+            self.shared.close()
+            self.shared.unlink()
+            self.shared = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def time_to_depth(workers, depth, hash_mb = 16, backend = None):
+    """Times searches of every game position to a depth.
+
+    Args:
+        workers(int): The number of workers searching.
+        depth(int): The depth to reach.
+        hash_mb(float): The memory budget of the shared table.
+        backend(str): 'threads' or 'processes', or None to pick by the build.
+
+    Returns:
+        tuple: (seconds, nodes) summed over the positions.
+    """
+    seconds = 0.0
+    nodes = 0
+    with ParallelSearch(workers, hash_mb, backend) as search:
+        # The helpers are started, and have built their engines, before any
+        # search is timed
+        search.search(Position.from_board(start_board, 'w'), WARM_UP_DEPTH)
+        for board, mover, info in games_list:
+            # No table is carried over from one position to the next
+            search.clear()
+            result = search.search(Position.from_board(board, mover), depth)
+            seconds += result.time
+            nodes += result.nodes
+    return seconds, nodes
+
+
+def main(argv = None):
+    """Reads the command line and prints time to depth by worker count."""
+    parser = argparse.ArgumentParser(description = 'Measures the time the '
+                                     'parallel search takes to reach a depth '
+                                     'on the game positions.')
+    parser.add_argument('--depth', type = int, default = 6,
+                        help = 'depth to reach (default 6)')
+    parser.add_argument('--workers', type = int, nargs = '+', default = [1, 2, 4],
+                        help = 'worker counts to compare (default 1 2 4)')
+    parser.add_argument('--hash', type = float, default = 16,
+                        help = 'shared table size in MB (default 16)')
+    parser.add_argument('--backend', choices = ['threads', 'processes', 'both'],
+                        help = 'run workers as threads, processes or each in '
+                        'turn (default threads only without the GIL)')
+    args = parser.parse_args(argv)
+
+    print('Python %s, GIL %s' % (sys.version.split()[0],
+                                 'disabled' if gil_disabled() else 'enabled'))
+    if args.backend == 'both':
+        backends = ['threads', 'processes']
+    else:
+        backends = [args.backend or default_backend()]
+    for backend in backends:
+        base = None
+        for workers in args.workers:
+            seconds, nodes = time_to_depth(workers, args.depth, args.hash,
+                                           backend)
+            base = base or seconds
+            print('%-9s %3d workers: %7.2f s to depth %d, %9d nodes, '
+                  'speedup %.2f' % (backend, workers, seconds, args.depth,
+                                    nodes, base / seconds))
+
+
+if __name__ == '__main__':
+    main()
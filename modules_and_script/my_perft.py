@@ -0,0 +1,341 @@
+"""Perft counts every leaf of the legal move tree down to a given depth.
+
+Comparing the counts with known values checks the move generation, and the
+time it takes measures how fast it is. Run it from this folder, for example:
+
+    python my_perft.py --depth 3
+    python my_perft.py --depth 2 --positions tests games
+    python my_perft.py --depth 4 --positions reference --divide
+    python my_perft.py --depth 5 --positions games --workers 32
+
+Work is split over threads on a free-threaded Python (one built without the
+GIL, where threads run on several cores at once), and over processes
+otherwise. --backend picks one or the other.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from my_position import Position, move_name
+from my_boards import start_board, test_list, games_list
+
+# Standard positions with published node counts, starting at depth 1
+REFERENCE_POSITIONS = [
+    ['Initial position',
+     'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+     [20, 400, 8902, 197281, 4865609]],
+    ['Kiwipete',
+     'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+     [48, 2039, 97862, 4085603]],
+    ['Position 3',
+     '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+     [14, 191, 2812, 43238, 674624]],
+    ['Position 4',
+     'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+     [6, 264, 9467, 422333]],
+    ['Position 5',
+     'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+     [44, 1486, 62379, 2103487]],
+    ['Position 6',
+     'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+     [46, 2079, 89890, 3894594]]]
+
+# Counts for the boards in my_boards, recorded from this move generation
+# (which matches every reference position above), to catch regressions.
+BOARD_COUNTS = {'Start board': [20, 400, 8902],
+                'T1/5 Test board for queen movement': [28, 623, 15163],
+                'T2/5 Test board for checkmate and stalemate': [1, 48, 0],
+                'T3/5 Test board for pawn promotion': [21, 425, 9559],
+                'T4/5 Test board for castling': [26, 568, 13744],
+                'T5/5 Test board for En passant': [16, 277, 4758],
+                'Gutma vs Vitolinsh 1979': [25, 1167, 27020],
+                'Kasparov vs Dubiel 1993': [44, 1243, 55443],
+                'Sagar vs Vinay 2013': [40, 1523, 61840],
+                'Anand vs Carlsen 2013': [27, 840, 21200],
+                'Sagar vs Deepthamsh 2012': [39, 1247, 48105]}
+
+POSITION_GROUPS = ['start', 'tests', 'games', 'reference']
+
+
+def perft(position, depth):
+    """Counts the leaf nodes of the legal move tree.
+
+    Args:
+        position(Position): The position to count from. It is changed while
+                            counting, and restored before returning.
+        depth(int): The number of moves to look ahead.
+
+    Returns:
+        int: The number of leaf nodes.
+    """
+    if depth == 0:
+        return 1
+    moves = position.legal_moves()
+    if depth == 1:
+        # Every legal move is a leaf, so they don't need to be made
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        position.make_move(move)
+        nodes += perft(position, depth - 1)
+        position.unmake_move()
+    return nodes
+
+
+def divide(position, depth):
+    """Splits a perft count by the first move.
+
+    Args:
+        position(Position): The position to count from.
+        depth(int): The number of moves to look ahead, at least 1.
+
+    Returns:
+        list: [move name, nodes] for each legal move of the position.
+    """
+    counts = []
+    for move in position.legal_moves():
+        position.make_move(move)
+        counts.append([move_name(move), perft(position, depth - 1)])
+        position.unmake_move()
+    return counts
+
+
+def count_workers(workers):
+    """Turns a requested worker count into a real one.
+
+    Args:
+        workers(int): The number of workers, or 0 or None to use every core
+                      of the machine.
+
+    Returns:
+        int: The number of workers to start.
+    """
+    if not workers:
+        workers = os.cpu_count() or 1
+    return max(1, workers)
+
+
+def gil_disabled():
+    """Returns True on a free-threaded Python running without the GIL."""
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def default_backend():
+    """Returns 'threads' if threads can run at once, otherwise 'processes'."""
+    return 'threads' if gil_disabled() else 'processes'
+
+
+def make_executor(workers = None, backend = None):
+    """Starts a pool of worker threads or processes.
+
+    Threads share every object with the caller, so nothing is pickled, but
+    they only run at once without the GIL. Processes need their work
+    pickled, but run at once on any build.
+
+    Args:
+        workers(int): The number of workers, or 0 or None for one per core.
+        backend(str): 'threads' or 'processes', or None to pick threads only
+                      when the GIL is disabled.
+
+    Returns:
+        Executor: The running pool.
+    """
+    workers = count_workers(workers)
+    if (backend or default_backend()) == 'threads':
+        return ThreadPoolExecutor(max_workers = workers)
+    return ProcessPoolExecutor(max_workers = workers)
+
+
+def search_subtree(task):
+    """Runs a tree walk below one root move, inside a worker.
+
+    Args:
+        task(list): [walk, packed position, move, depth], where walk is a
+                    module level function taking a position and a depth, and
+                    the position is packed by Position.to_bytes.
+
+    Returns:
+        The result of walk on the position after the move.
+    """
+    walk, data, move, depth = task
+    position = Position.from_bytes(data)
+    position.make_move(move)
+    return walk(position, depth - 1)
+
+
+def split_root(position, depth, walk = perft, workers = None, executor = None,
+               backend = None):
+    """Runs a tree walk on every root move at once, one move per task.
+
+    Each task gets the 70 byte packed position and its root move, so only a
+    few bytes go to a worker process for each subtree, and each worker
+    thread unpacks a position of its own to change.
+
+    Args:
+        position(Position): The position to walk from. It is not changed.
+        depth(int): The depth of the walk, at least 1.
+        walk(function): A module level function taking a position and a
+                        depth, perft by default.
+        workers(int): The number of workers, or 0 or None to use
+                      every core.
+        executor(Executor): An already running pool to use instead of
+                            starting one.
+        backend(str): 'threads' or 'processes' for a new pool, or None to
+                      pick by make_executor.
+
+    Returns:
+        list: [move, result] for each legal move of the position.
+    """
+    moves = position.legal_moves()
+    data = position.to_bytes()
+    tasks = [[walk, data, move, depth] for move in moves]
+    if executor is not None:
+        results = list(executor.map(search_subtree, tasks))
+    else:
+        with make_executor(workers, backend) as pool:
+            results = list(pool.map(search_subtree, tasks))
+    return [[move, result] for move, result in zip(moves, results)]
+
+
+def parallel_perft(position, depth, workers = None, executor = None,
+                   backend = None):
+    """Counts the leaf nodes of the legal move tree across several workers.
+
+    Args:
+        position(Position): The position to count from. It is not changed.
+        depth(int): The number of moves to look ahead.
+        workers(int): The number of workers, or 0 or None to use
+                      every core.
+        executor(Executor): An already running pool to use instead of
+                            starting one.
+        backend(str): 'threads' or 'processes' for a new pool, or None to
+                      pick by make_executor.
+
+    Returns:
+        int: The number of leaf nodes.
+    """
+    if depth <= 1:
+        return perft(position, depth)
+    split = split_root(position, depth, perft, workers, executor, backend)
+    return sum(nodes for move, nodes in split)
+
+
+def board_name(info):
+    """Returns the name of a board from its info text in my_boards."""
+    return info.split('|')[-1].strip()
+
+
+def named_positions(groups):
+    """Collects the positions to count.
+
+    Args:
+        groups(list): Any of 'start', 'tests', 'games' and 'reference'.
+
+    Returns:
+        list: [name, position, known counts] for every position.
+    """
+    positions = []
+    if 'start' in groups:
+        positions.append(['Start board', Position.from_board(start_board, 'w'),
+                          BOARD_COUNTS['Start board']])
+    for group, boards in (('tests', test_list), ('games', games_list)):
+        if group in groups:
+            for board, mover, info in boards:
+                name = board_name(info)
+                positions.append([name, Position.from_board(board, mover),
+                                  BOARD_COUNTS.get(name, [])])
+    if 'reference' in groups:
+        for name, fen, counts in REFERENCE_POSITIONS:
+            positions.append([name, Position.from_fen(fen), counts])
+    return positions
+
+
+def run(groups, depth, show_divide = False, workers = 1, backend = None):
+    """Runs perft on each position and prints the counts and speed.
+
+    Args:
+        groups(list): The groups of positions to count.
+        depth(int): The number of moves to look ahead.
+        show_divide(bool): Also prints the count of every first move.
+        workers(int): The number of workers, 1 to count in this process, or
+                      0 to use every core.
+        backend(str): 'threads' or 'processes', or None to pick by
+                      make_executor.
+
+    Returns:
+        bool: True if every count with a known value matched it.
+    """
+    workers = count_workers(workers)
+    pool = None
+    if workers > 1:
+        # One pool for every position, so workers only start once
+        backend = backend or default_backend()
+        pool = make_executor(workers, backend)
+        print('Counting with %d worker %s' % (workers, backend))
+
+    all_match = True
+    total_nodes = 0
+    total_time = 0.0
+    for name, position, counts in named_positions(groups):
+        start = time.perf_counter()
+        if show_divide and pool is not None:
+            split = [[move_name(move), count] for move, count
+                     in split_root(position, depth, perft, executor = pool)]
+            nodes = sum(count for move, count in split)
+        elif show_divide:
+            split = divide(position, depth)
+            nodes = sum(count for move, count in split)
+        elif pool is not None:
+            nodes = parallel_perft(position, depth, executor = pool)
+        else:
+            nodes = perft(position, depth)
+        elapsed = time.perf_counter() - start
+        total_nodes += nodes
+        total_time += elapsed
+
+        if depth <= len(counts):
+            matches = (nodes == counts[depth - 1])
+            result = 'ok' if matches else 'MISMATCH, expected %d' % counts[depth - 1]
+            all_match = all_match and matches
+        else:
+            result = 'no known count'
+        print('%-45s %10d nodes %8.2f s %9.0f nps  %s'
+              % (name, nodes, elapsed, nodes / max(elapsed, 1e-9), result))
+        if show_divide:
+            for move, count in split:
+                print('    %-6s %d' % (move, count))
+
+    print('Total: %d nodes in %.2f s, %.0f nodes per second'
+          % (total_nodes, total_time, total_nodes / max(total_time, 1e-9)))
+    if pool is not None:
+        pool.shutdown()
+    return all_match
+
+
+def main(argv = None):
+    """Reads the command line and runs perft."""
+    parser = argparse.ArgumentParser(description = 'Counts legal move tree '
+                                     'leaves to test and time move generation.')
+    parser.add_argument('--depth', type = int, default = 3,
+                        help = 'number of moves to look ahead (default 3)')
+    parser.add_argument('--positions', nargs = '+', default = POSITION_GROUPS,
+                        choices = POSITION_GROUPS,
+                        help = 'which positions to count (default all)')
+    parser.add_argument('--divide', action = 'store_true',
+                        help = 'show the count of every first move')
+    parser.add_argument('--workers', type = int, default = 1,
+                        help = 'number of workers, 0 for one per core '
+                        '(default 1)')
+    parser.add_argument('--backend', choices = ['threads', 'processes'],
+                        help = 'run workers as threads or processes (default '
+                        'threads only without the GIL)')
+    args = parser.parse_args(argv)
+    if not run(args.positions, args.depth, args.divide, args.workers,
+               args.backend):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,972 @@
+"""Bitboard position and move generation.
+
+The Position class keeps one bitboard per piece type and color, plus the
+occupancy of each side, and generates legal moves from them. The Piece
+classes in my_classes use it to answer legal_moves and legal_takes.
+"""
+import random
+from my_bitboards import (WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+    FULL, ROW_MASKS, BETWEEN, LINE, KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS,
+    piece_code, bit, squares_of, rook_attacks, bishop_attacks)
+
+# Castling rights, stored as bit flags.
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+
+# Move flags. A move is a single int: from square, to square, flags and the
+# piece type a pawn promotes to.
+CAPTURE = 1
+EN_PASSANT = 2
+CASTLE = 4
+DOUBLE_PUSH = 8
+
+# Maps the piece names used by the Piece classes to piece types.
+PIECE_TYPES = {'p': PAWN, 'n': KNIGHT, 'bi': BISHOP, 'r': ROOK, 'q': QUEEN,
+               'k': KING}
+COLORS = {'w': WHITE, 'b': BLACK}
+
+# Letters used for the pieces in FEN strings and move names. White pieces are
+# upper case in FEN.
+FEN_LETTERS = ' pnbrqk'
+FILES = 'abcdefgh'
+
+PROMOTIONS = (QUEEN, ROOK, BISHOP, KNIGHT)
+
+# Results of Position.game_status
+ONGOING = 'ongoing'
+CHECK = 'check'
+CHECKMATE = 'checkmate'
+STALEMATE = 'stalemate'
+
+# (king square, rook square, castling right) of each home corner
+CASTLING_CORNERS = [(60, 63, WHITE_KINGSIDE), (60, 56, WHITE_QUEENSIDE),
+                    (4, 7, BLACK_KINGSIDE), (4, 0, BLACK_QUEENSIDE)]
+
+# Castling rights that are kept when a move starts or ends on each square.
+# Moving a king or rook, or capturing a rook in its corner, loses the right.
+CASTLING_KEPT = [15] * 64
+for _king_sq, _rook_sq, _right in CASTLING_CORNERS:
+    CASTLING_KEPT[_king_sq] &= ~_right
+    CASTLING_KEPT[_rook_sq] &= ~_right
+
+# Zobrist keys. A position's key is the XOR of one random 64-bit number for
+# each piece on its square, one for black to move, one for its castling
+# rights and one for the file of its en passant square, so a move only has
+# to XOR in the numbers of what it changed. The seed keeps keys the same
+# from run to run, so they can be stored.
+_zobrist_random = random.Random(2019)
+ZOBRIST_PIECES = [[_zobrist_random.getrandbits(64) for sq in range(64)]
+                  for code in range(16)]
+ZOBRIST_BLACK = _zobrist_random.getrandbits(64)
+_castling_keys = [_zobrist_random.getrandbits(64) for right in range(4)]
+ZOBRIST_CASTLING = [0] * 16
+for _rights in range(16):
+    for _i in range(4):
+        if _rights & (1 << _i):
+            ZOBRIST_CASTLING[_rights] ^= _castling_keys[_i]
+ZOBRIST_EP_FILES = [_zobrist_random.getrandbits(64) for cl in range(8)]
+
+
+def encode_move(frm, to, flags = 0, promotion = 0):
+    """Packs a move into an int.
+
+    Args:
+        frm(int): The square the piece moves from.
+        to(int): The square the piece moves to.
+        flags(int): Any of CAPTURE, EN_PASSANT, CASTLE and DOUBLE_PUSH.
+        promotion(int): The piece type a pawn promotes to, 0 otherwise.
+
+    Returns:
+        int: The encoded move.
+    """
+    return frm | (to << 6) | (flags << 12) | (promotion << 16)
+
+
+def move_source(move):
+    """Returns the square a move starts from."""
+    return move & 63
+
+
+def move_target(move):
+    """Returns the square a move ends on."""
+    return (move >> 6) & 63
+
+
+def move_flags(move):
+    """Returns the flags of a move."""
+    return (move >> 12) & 15
+
+
+def move_promotion(move):
+    """Returns the piece type a move promotes to, or 0."""
+    return move >> 16
+
+
+def square_name(sq):
+    """Returns the name of a square, such as 'e4'."""
+    return FILES[sq % 8] + str(8 - sq // 8)
+
+
+def square_from_name(name):
+    """Returns the square of a name such as 'e4'."""
+    return (8 - int(name[1]))*8 + FILES.index(name[0])
+
+
+def move_name(move):
+    """Returns a move in coordinate notation, such as 'e2e4' or 'e7e8q'.
+
+    Args:
+        move(int): The encoded move.
+
+    Returns:
+        str: The name of the move.
+    """
+    name = square_name(move & 63) + square_name((move >> 6) & 63)
+    if move >> 16:
+        name += FEN_LETTERS[move >> 16]
+    return name
+
+
+class Position():
+    """Chess position stored as bitboards and a flat array of 64 squares.
+
+    The position only changes through make_move and unmake_move. play returns
+    a new position instead, and to_bytes packs a position into 70 bytes that
+    can be stored or sent to another process. key identifies the position
+    for caches and is kept up to date by every move.
+
+    Args:
+        None
+
+    Attributes:
+        pieces(list): 16 bitboards indexed by piece code. Index 0 and 8 are
+                      unused.
+        occupied(list): Bitboards of all white and all black pieces.
+        squares(bytearray): The piece code on each of the 64 squares.
+        kings(list): The square of the white and black king, or -1.
+        side(int): The color to move (WHITE or BLACK).
+        castling(int): Castling rights, as bit flags.
+        ep(int): The en passant target square, or -1 if there is none.
+        halfmove(int): Moves since the last capture or pawn move.
+        fullmove(int): The move number, starting at 1.
+        history(list): Undo records of the moves made with make_move.
+        key(int): The 64-bit Zobrist key of the position.
+    """
+    __slots__ = ('pieces', 'occupied', 'squares', 'kings', 'side', 'castling',
+                 'ep', 'halfmove', 'fullmove', 'history', 'key')
+
+    def __init__(self):
+        self.pieces = [0] * 16
+        self.occupied = [0, 0]
+        self.squares = bytearray(64)
+        self.kings = [-1, -1]
+        self.side = WHITE
+        self.castling = 0
+        self.ep = -1
+        self.halfmove = 0
+        self.fullmove = 1
+        self.history = []
+        self.key = 0
+
+    def put_piece(self, sq, code):
+        """Places a piece on an empty square.
+
+        Args:
+            sq(int): The square.
+            code(int): The piece code.
+        """
+        b = 1 << sq
+        self.pieces[code] |= b
+        self.occupied[code >> 3] |= b
+        self.squares[sq] = code
+        self.key ^= ZOBRIST_PIECES[code][sq]
+        if (code & 7) == KING:
+            self.kings[code >> 3] = sq
+
+    def compute_key(self):
+        """Works out the Zobrist key from scratch.
+
+        make_move and unmake_move keep key up to date, so this is only needed
+        after changing the side, castling rights or en passant square by hand,
+        or to check the kept key.
+
+        Returns:
+            int: The Zobrist key of the position.
+        """
+        key = 0
+        for sq in range(64):
+            if self.squares[sq]:
+                key ^= ZOBRIST_PIECES[self.squares[sq]][sq]
+        if self.side == BLACK:
+            key ^= ZOBRIST_BLACK
+        key ^= ZOBRIST_CASTLING[self.castling]
+        if self.ep >= 0:
+            key ^= ZOBRIST_EP_FILES[self.ep % 8]
+        return key
+
+    def to_bytes(self):
+        """Packs the position into 70 bytes.
+
+        The first 64 bytes are the squares, followed by the side to move, the
+        castling rights, the en passant square plus one, the halfmove clock
+        and two bytes of move number. The undo history is not included.
+
+        Returns:
+            bytes: The packed position.
+        """
+        return (bytes(self.squares)
+                + bytes((self.side, self.castling, self.ep + 1,
+                         min(self.halfmove, 255)))
+                + self.fullmove.to_bytes(2, 'little'))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Unpacks a position made by to_bytes.
+
+        Args:
+            data(bytes): The packed position.
+
+        Returns:
+            Position: The new position.
+        """
+        position = cls()
+        for sq in range(64):
+            if data[sq]:
+                position.put_piece(sq, data[sq])
+        position.side = data[64]
+        position.castling = data[65]
+        position.ep = data[66] - 1
+        position.halfmove = data[67]
+        position.fullmove = int.from_bytes(data[68:70], 'little')
+        position.key = position.compute_key()
+        return position
+
+    @classmethod
+    def from_fen(cls, fen):
+        """Builds a position from a FEN string.
+
+        Args:
+            fen(str): The position in Forsyth-Edwards Notation. The move
+                      counters may be left out.
+
+        Returns:
+            Position: The new position.
+        """
+        fields = fen.split()
+        position = cls()
+        for rw, row in enumerate(fields[0].split('/')):
+            cl = 0
+            for letter in row:
+                if letter.isdigit():
+                    cl += int(letter)
+                    continue
+                color = WHITE if letter.isupper() else BLACK
+                piece_type = FEN_LETTERS.index(letter.lower())
+                position.put_piece(rw*8 + cl, piece_code(color, piece_type))
+                cl += 1
+        position.side = WHITE if fields[1] == 'w' else BLACK
+        for letter, right in zip('KQkq', (WHITE_KINGSIDE, WHITE_QUEENSIDE,
+                                          BLACK_KINGSIDE, BLACK_QUEENSIDE)):
+            if letter in fields[2]:
+                position.castling |= right
+        if fields[3] != '-':
+            position.ep = square_from_name(fields[3])
+        if len(fields) > 5:
+            position.halfmove = int(fields[4])
+            position.fullmove = int(fields[5])
+        position.key = position.compute_key()
+        return position
+
+    def fen(self):
+        """Returns the position as a FEN string."""
+        rows = []
+        for rw in range(8):
+            row = ''
+            empty = 0
+            for code in self.squares[rw*8:rw*8 + 8]:
+                if code == 0:
+                    empty += 1
+                    continue
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                letter = FEN_LETTERS[code & 7]
+                row += letter.upper() if (code >> 3) == WHITE else letter
+            if empty:
+                row += str(empty)
+            rows.append(row)
+        castling = ''.join(letter for letter, right in
+                           zip('KQkq', (WHITE_KINGSIDE, WHITE_QUEENSIDE,
+                                        BLACK_KINGSIDE, BLACK_QUEENSIDE))
+                           if self.castling & right)
+        ep = square_name(self.ep) if self.ep >= 0 else '-'
+        return ' '.join(('/'.join(rows), 'wb'[self.side], castling or '-', ep,
+                         str(self.halfmove), str(self.fullmove)))
+
+    def copy(self):
+        """Returns a copy of the position, without its undo history."""
+        position = Position.__new__(Position)
+        position.pieces = list(self.pieces)
+        position.occupied = list(self.occupied)
+        position.squares = bytearray(self.squares)
+        position.kings = list(self.kings)
+        position.side = self.side
+        position.castling = self.castling
+        position.ep = self.ep
+        position.halfmove = self.halfmove
+        position.fullmove = self.fullmove
+        position.history = []
+        position.key = self.key
+        return position
+
+    def play(self, move):
+        """Returns the position after a move, leaving this one unchanged.
+
+        Args:
+            move(int): An encoded legal move of the side to move.
+
+        Returns:
+            Position: The new position.
+        """
+        position = self.copy()
+        position.make_move(move)
+        position.history = []
+        return position
+
+    def __eq__(self, other):
+        # The move counters are not part of what makes two positions equal
+        return (isinstance(other, Position) and
+                (self.squares == other.squares) and
+                (self.side == other.side) and
+                (self.castling == other.castling) and
+                (self.ep == other.ep))
+
+    # Moves are made in place, changing the key, so a position in a set or
+    # used as a dict key would be lost by the next move. Positions are not
+    # hashable: tables of positions are indexed by key instead.
+    __hash__ = None
+
+    def __reduce__(self):
+        return (Position.from_bytes, (self.to_bytes(),))
+
+    @classmethod
+    def from_board(cls, board, color = 'w'):
+        """Builds a position from an 8x8 board of Piece objects.
+
+        Pieces don't record whether they have moved, so castling rights are
+        given to every king and rook still on their home squares, and there is
+        no en passant square. The game keeps a Position for everything after
+        the starting layout, so it doesn't lose this state.
+
+        Args:
+            board(numpy array): The board layout.
+            color(str): The color to move ('w' or 'b').
+
+        Returns:
+            Position: The new position.
+        """
+        position = cls()
+        position.side = COLORS[color]
+        for rw in range(8):
+            for cl in range(8):
+                piece = board[rw, cl]
+                if piece == 0:
+                    continue
+                position.put_piece(rw*8 + cl, piece_code(COLORS[piece.color],
+                                                         PIECE_TYPES[piece.piece]))
+
+        for king_sq, rook_sq, right in CASTLING_CORNERS:
+            owner = BLACK if right >= BLACK_KINGSIDE else WHITE
+            if ((position.squares[king_sq] == piece_code(owner, KING)) and
+                (position.squares[rook_sq] == piece_code(owner, ROOK))):
+                position.castling |= right
+        position.key = position.compute_key()
+        return position
+
+    def piece_at(self, sq):
+        """Returns the piece code on a square, or 0 if it is empty."""
+        return self.squares[sq]
+
+    def king_square(self, color):
+        """Returns the square of the king of the given color, or -1.
+
+        The king squares are kept up to date by every move, so this doesn't
+        have to search the board.
+        """
+        return self.kings[color]
+
+    def attackers(self, sq, color, occupied, pieces = None):
+        """Returns the pieces of one color that attack a square.
+
+        Args:
+            sq(int): The attacked square.
+            color(int): The color of the attacking pieces.
+            occupied(int): Bitboard of occupied squares used for sliders.
+            pieces(list): Piece bitboards to use, defaults to the position's.
+
+        Returns:
+            int: Bitboard of the attacking pieces.
+        """
+        if pieces is None:
+            pieces = self.pieces
+        offset = color << 3
+        queens = pieces[QUEEN | offset]
+        return ((PAWN_ATTACKS[color ^ 1][sq] & pieces[PAWN | offset])
+                | (KNIGHT_ATTACKS[sq] & pieces[KNIGHT | offset])
+                | (KING_ATTACKS[sq] & pieces[KING | offset])
+                | (rook_attacks(sq, occupied)
+                   & (pieces[ROOK | offset] | queens))
+                | (bishop_attacks(sq, occupied)
+                   & (pieces[BISHOP | offset] | queens)))
+
+    def is_attacked(self, sq, color):
+        """Returns True if any piece of the given color attacks a square."""
+        occupied = self.occupied[WHITE] | self.occupied[BLACK]
+        return self.attackers(sq, color, occupied) != 0
+
+    def in_check(self):
+        """Returns True if the side to move is in check."""
+        king_sq = self.king_square(self.side)
+        return (king_sq >= 0) and self.is_attacked(king_sq, self.side ^ 1)
+
+    def pseudo_moves_from(self, sq):
+        """Generates moves for the piece on a square, ignoring checks.
+
+        Args:
+            sq(int): The square of a piece of the side to move.
+
+        Returns:
+            list: Encoded moves.
+        """
+        code = self.piece_at(sq)
+        us = self.side
+        if (code == 0) or ((code >> 3) != us):
+            return []
+        piece_type = code & 7
+        own = self.occupied[us]
+        enemy = self.occupied[us ^ 1]
+        occupied = own | enemy
+        moves = []
+
+        if piece_type == PAWN:
+            self._pawn_moves(sq, enemy, occupied, moves)
+            return moves
+
+        if piece_type == KNIGHT:
+            targets = KNIGHT_ATTACKS[sq]
+        elif piece_type == BISHOP:
+            targets = bishop_attacks(sq, occupied)
+        elif piece_type == ROOK:
+            targets = rook_attacks(sq, occupied)
+        elif piece_type == QUEEN:
+            targets = rook_attacks(sq, occupied) | bishop_attacks(sq, occupied)
+        else:
+            targets = KING_ATTACKS[sq]
+            self._castling_moves(sq, occupied, moves)
+        targets &= ~own
+        for to in squares_of(targets & enemy):
+            moves.append(encode_move(sq, to, CAPTURE))
+        for to in squares_of(targets & ~occupied):
+            moves.append(encode_move(sq, to))
+        return moves
+
+    def _pawn_moves(self, sq, enemy, occupied, moves):
+        """Adds the pawn pushes, captures and promotions from a square."""
+        us = self.side
+        if us == WHITE:
+            step = -8
+            home_row = ROW_MASKS[6]
+            last_row = ROW_MASKS[0]
+        else:
+            step = 8
+            home_row = ROW_MASKS[1]
+            last_row = ROW_MASKS[7]
+        b = 1 << sq
+
+        captures = PAWN_ATTACKS[us][sq]
+        for to in squares_of(captures & enemy):
+            self._add_pawn_move(sq, to, CAPTURE, last_row, moves)
+        if (self.ep >= 0) and (captures & bit(self.ep)):
+            moves.append(encode_move(sq, self.ep, CAPTURE | EN_PASSANT))
+
+        one = sq + step
+        if not (occupied & bit(one)):
+            self._add_pawn_move(sq, one, 0, last_row, moves)
+            two = one + step
+            if (b & home_row) and not (occupied & bit(two)):
+                moves.append(encode_move(sq, two, DOUBLE_PUSH))
+
+    def _add_pawn_move(self, frm, to, flags, last_row, moves):
+        """Adds a pawn move, expanding it into promotions on the last row."""
+        if bit(to) & last_row:
+            for promotion in PROMOTIONS:
+                moves.append(encode_move(frm, to, flags, promotion))
+        else:
+            moves.append(encode_move(frm, to, flags))
+
+    def _castling_moves(self, sq, occupied, moves):
+        """Adds castling moves for a king standing on a square."""
+        us = self.side
+        them = us ^ 1
+        for king_sq, rook_sq, right in CASTLING_CORNERS:
+            if (king_sq != sq) or not (self.castling & right):
+                continue
+            if not (self.pieces[piece_code(us, ROOK)] & bit(rook_sq)):
+                continue
+            step = 1 if rook_sq > king_sq else -1
+            # Every square between the king and rook must be empty, and the
+            # king may not start on, pass over or land on an attacked square.
+            between = range(king_sq + step, rook_sq, step)
+            if any(occupied & bit(s) for s in between):
+                continue
+            path = (king_sq, king_sq + step, king_sq + 2*step)
+            if any(self.is_attacked(s, them) for s in path):
+                continue
+            moves.append(encode_move(king_sq, king_sq + 2*step, CASTLE))
+
+    def is_legal(self, move):
+        """Checks that a pseudo legal move does not leave the king in check.
+
+        Args:
+            move(int): An encoded pseudo legal move of the side to move.
+
+        Returns:
+            True if the move is legal, False otherwise.
+        """
+        us = self.side
+        them = us ^ 1
+        frm = move_source(move)
+        to = move_target(move)
+        flags = move_flags(move)
+        pieces = list(self.pieces)
+        code = self.piece_at(frm)
+        from_to = bit(frm) | bit(to)
+        occupied = (self.occupied[us] | self.occupied[them]) ^ bit(frm)
+        occupied |= bit(to)
+
+        # Removes the captured piece from the copied bitboards
+        if flags & EN_PASSANT:
+            victim = to + (8 if us == WHITE else -8)
+            pieces[piece_code(them, PAWN)] ^= bit(victim)
+            occupied ^= bit(victim)
+        elif flags & CAPTURE:
+            pieces[self.piece_at(to)] ^= bit(to)
+        pieces[code] ^= from_to
+
+        king_sq = to if (code & 7) == KING else self.king_square(us)
+        if king_sq < 0:
+            return True
+        return self.attackers(king_sq, them, occupied, pieces) == 0
+
+    def check_and_pins(self):
+        """Works out the check mask and the pinned pieces of the side to move.
+
+        Args:
+            None
+
+        Returns:
+            check_mask(int): Squares a piece other than the king may move to.
+                             Every square when not in check, the checking piece
+                             and the squares between it and the king when in
+                             check, and no squares in double check.
+            pins(dict): Maps the square of each pinned piece to the line it is
+                        allowed to move along.
+        """
+        us = self.side
+        them = us ^ 1
+        king_sq = self.king_square(us)
+        pins = {}
+        if king_sq < 0:
+            return FULL, pins
+        own = self.occupied[us]
+        enemy = self.occupied[them]
+        occupied = own | enemy
+
+        checkers = self.attackers(king_sq, them, occupied)
+        if checkers == 0:
+            check_mask = FULL
+        elif checkers & (checkers - 1):
+            check_mask = 0
+        else:
+            check_mask = checkers | BETWEEN[king_sq][checkers.bit_length() - 1]
+
+        # Sliders that would attack the king if only enemy pieces were on the
+        # board pin a friendly piece if it is the only piece in between.
+        offset = them << 3
+        queens = self.pieces[QUEEN | offset]
+        snipers = ((rook_attacks(king_sq, enemy)
+                    & (self.pieces[ROOK | offset] | queens))
+                   | (bishop_attacks(king_sq, enemy)
+                      & (self.pieces[BISHOP | offset] | queens)))
+        for sniper in squares_of(snipers):
+            blockers = BETWEEN[king_sq][sniper] & occupied
+            if blockers and not (blockers & (blockers - 1)) and (blockers & own):
+                pins[blockers.bit_length() - 1] = LINE[king_sq][sniper]
+        return check_mask, pins
+
+    def legal_moves_from(self, sq, check_mask = None, pins = None):
+        """Generates the legal moves for the piece on a square.
+
+        Pseudo legal moves are filtered against the check mask and pin lines
+        of the position, so no move has to be tried out on a board. Only king
+        moves and en passant captures need their own attack test.
+
+        Args:
+            sq(int): The square of a piece of the side to move.
+            check_mask(int): The check mask from check_and_pins. Worked out
+                             here if not given.
+            pins(dict): The pins from check_and_pins.
+
+        Returns:
+            list: Encoded legal moves.
+        """
+        if check_mask is None:
+            check_mask, pins = self.check_and_pins()
+        moves = self.pseudo_moves_from(sq)
+        if not moves:
+            return moves
+        code = self.piece_at(sq)
+
+        if (code & 7) == KING:
+            # The king itself is removed from the occupancy so that it can't
+            # hide behind its own square from a slider.
+            them = self.side ^ 1
+            occupied = ((self.occupied[WHITE] | self.occupied[BLACK])
+                        ^ bit(sq))
+            return [move for move in moves
+                    if (move_flags(move) & CASTLE) or
+                    not self.attackers(move_target(move), them, occupied)]
+
+        allowed = check_mask & pins.get(sq, FULL)
+        legal = []
+        for move in moves:
+            if move_flags(move) & EN_PASSANT:
+                # Removes two pieces from one row, so it can uncover a check
+                # that no pin accounts for. It is tested directly instead.
+                if self.is_legal(move):
+                    legal.append(move)
+            elif allowed & bit(move_target(move)):
+                legal.append(move)
+        return legal
+
+    def iter_legal_moves(self, tactical = True, quiet = True):
+        """Yields the legal moves of the side to move, one at a time.
+
+        The check mask and pins are worked out once and shared by every
+        piece. Each piece's targets are masked with them before any move is
+        made, so illegal moves are never built. Moves are only generated as
+        they are asked for, so a caller that stops early skips the rest.
+
+        Args:
+            tactical(bool): Include captures and promotions.
+            quiet(bool): Include every other move, castling among them.
+
+        Yields:
+            int: Encoded legal moves, as (from, to, flags, promotion) packed
+                 into ints by encode_move. King moves come first.
+        """
+        us = self.side
+        them = us ^ 1
+        pieces = self.pieces
+        own = self.occupied[us]
+        enemy = self.occupied[them]
+        occupied = own | enemy
+        offset = us << 3
+        check_mask, pins = self.check_and_pins()
+        # The squares moves may end on, besides the check mask
+        wanted = (enemy if tactical else 0) | (~occupied if quiet else 0)
+
+        # King moves are tested against attacks with the king lifted off the
+        # board, so it can't step back along the line of a checking slider.
+        king_sq = self.kings[us]
+        if king_sq >= 0:
+            without_king = occupied ^ (1 << king_sq)
+            targets = KING_ATTACKS[king_sq] & ~own & wanted
+            for to in squares_of(targets):
+                if not self.attackers(to, them, without_king):
+                    flags = CAPTURE if enemy & (1 << to) else 0
+                    yield encode_move(king_sq, to, flags)
+            if quiet and check_mask == FULL:
+                castles = []
+                self._castling_moves(king_sq, occupied, castles)
+                yield from castles
+        if check_mask == 0:
+            # Double check, only the king can move
+            return
+
+        for piece_type in (KNIGHT, BISHOP, ROOK, QUEEN):
+            for sq in squares_of(pieces[piece_type | offset]):
+                if piece_type == KNIGHT:
+                    targets = KNIGHT_ATTACKS[sq]
+                elif piece_type == BISHOP:
+                    targets = bishop_attacks(sq, occupied)
+                elif piece_type == ROOK:
+                    targets = rook_attacks(sq, occupied)
+                else:
+                    targets = (rook_attacks(sq, occupied)
+                               | bishop_attacks(sq, occupied))
+                targets &= wanted & check_mask
+                if sq in pins:
+                    targets &= pins[sq]
+                for to in squares_of(targets & enemy):
+                    yield encode_move(sq, to, CAPTURE)
+                for to in squares_of(targets & ~occupied):
+                    yield encode_move(sq, to)
+
+        for sq in squares_of(pieces[PAWN | offset]):
+            pawn_moves = []
+            self._pawn_moves(sq, enemy, occupied, pawn_moves)
+            allowed = check_mask & pins.get(sq, FULL)
+            for move in pawn_moves:
+                if (move_flags(move) & CAPTURE) or move_promotion(move):
+                    if not tactical:
+                        continue
+                elif not quiet:
+                    continue
+                if move_flags(move) & EN_PASSANT:
+                    if self.is_legal(move):
+                        yield move
+                elif allowed & (1 << ((move >> 6) & 63)):
+                    yield move
+
+    def legal_moves(self):
+        """Generates every legal move of the side to move in one pass.
+
+        Args:
+            None
+
+        Returns:
+            list: Encoded legal moves, from iter_legal_moves.
+        """
+        return list(self.iter_legal_moves())
+
+    def has_legal_move(self):
+        """Returns True if the side to move has any legal move.
+
+        Generation stops at the first legal move found, which is usually one
+        of the first king moves.
+        """
+        for move in self.iter_legal_moves():
+            return True
+        return False
+
+    def game_status(self):
+        """Works out whether the game is still going, and how it ended if not.
+
+        Args:
+            None
+
+        Returns:
+            str: ONGOING, CHECK, CHECKMATE or STALEMATE.
+        """
+        checked = self.in_check()
+        if self.has_legal_move():
+            return CHECK if checked else ONGOING
+        return CHECKMATE if checked else STALEMATE
+
+    def repetitions(self):
+        """Counts how often the position came up before, since the last
+        capture or pawn move.
+
+        Only the moves made with make_move are known, so a position built
+        from a board, FEN or bytes has no earlier positions.
+
+        Returns:
+            int: The number of earlier times the position was on the board.
+        """
+        history = self.history
+        last = len(history)
+        count = 0
+        # Each undo record holds the key from before its move. Only positions
+        # with the same side to move can repeat.
+        for i in range(last - 2, max(last - self.halfmove, 0) - 1, -2):
+            if history[i][5] == self.key:
+                count += 1
+        return count
+
+    def legal_targets(self, sq):
+        """Returns where the piece on a square can legally move or capture.
+
+        Args:
+            sq(int): The square of a piece of the side to move.
+
+        Returns:
+            quiet(int): Bitboard of squares it can move to without capturing.
+            captures(int): Bitboard of squares it can move to by capturing.
+        """
+        quiet = 0
+        captures = 0
+        for move in self.legal_moves_from(sq):
+            if move_flags(move) & CAPTURE:
+                captures |= bit(move_target(move))
+            else:
+                quiet |= bit(move_target(move))
+        return quiet, captures
+
+    def make_move(self, move):
+        """Plays a move on the position.
+
+        An undo record is pushed onto the history, holding the move, the
+        captured piece, the castling rights, en passant square, halfmove
+        clock and key from before the move, so unmake_move can take it back
+        exactly. The key is updated with only the squares that changed.
+
+        Args:
+            move(int): An encoded legal move of the side to move.
+        """
+        us = self.side
+        them = us ^ 1
+        pieces = self.pieces
+        occupied = self.occupied
+        squares = self.squares
+        frm = move & 63
+        to = (move >> 6) & 63
+        flags = (move >> 12) & 15
+        code = squares[frm]
+        from_bit = 1 << frm
+        to_bit = 1 << to
+        key = self.key
+
+        captured = 0
+        if flags & EN_PASSANT:
+            victim = to + 8 if us == WHITE else to - 8
+            captured = piece_code(them, PAWN)
+            pieces[captured] ^= 1 << victim
+            occupied[them] ^= 1 << victim
+            squares[victim] = 0
+            key ^= ZOBRIST_PIECES[captured][victim]
+        elif flags & CAPTURE:
+            captured = squares[to]
+            pieces[captured] ^= to_bit
+            occupied[them] ^= to_bit
+            key ^= ZOBRIST_PIECES[captured][to]
+        self.history.append((move, captured, self.castling, self.ep,
+                             self.halfmove, self.key))
+
+        promotion = move >> 16
+        moved = piece_code(us, promotion) if promotion else code
+        pieces[code] ^= from_bit
+        pieces[moved] ^= to_bit
+        occupied[us] ^= from_bit | to_bit
+        squares[frm] = 0
+        squares[to] = moved
+        key ^= ZOBRIST_PIECES[code][frm] ^ ZOBRIST_PIECES[moved][to]
+        if (code & 7) == KING:
+            self.kings[us] = to
+
+        if flags & CASTLE:
+            # The rook hops over the king, from its corner to the king's side
+            rook_from, rook_to = ((to + 1, to - 1) if to > frm
+                                  else (to - 2, to + 1))
+            rook = piece_code(us, ROOK)
+            rook_bits = (1 << rook_from) | (1 << rook_to)
+            pieces[rook] ^= rook_bits
+            occupied[us] ^= rook_bits
+            squares[rook_to] = rook
+            squares[rook_from] = 0
+            key ^= ZOBRIST_PIECES[rook][rook_from] ^ ZOBRIST_PIECES[rook][rook_to]
+
+        castling = self.castling & CASTLING_KEPT[frm] & CASTLING_KEPT[to]
+        key ^= ZOBRIST_CASTLING[self.castling] ^ ZOBRIST_CASTLING[castling]
+        self.castling = castling
+        if self.ep >= 0:
+            key ^= ZOBRIST_EP_FILES[self.ep % 8]
+        if flags & DOUBLE_PUSH:
+            self.ep = (frm + to) // 2
+            key ^= ZOBRIST_EP_FILES[self.ep % 8]
+        else:
+            self.ep = -1
+        if captured or ((code & 7) == PAWN):
+            self.halfmove = 0
+        else:
+            self.halfmove += 1
+        if us == BLACK:
+            self.fullmove += 1
+        self.side = them
+        self.key = key ^ ZOBRIST_BLACK
+
+    def unmake_move(self):
+        """Takes back the last move made with make_move.
+
+        Returns:
+            int: The move that was taken back.
+        """
+        move, captured, castling, ep, halfmove, key = self.history.pop()
+        them = self.side
+        us = them ^ 1
+        pieces = self.pieces
+        occupied = self.occupied
+        squares = self.squares
+        frm = move & 63
+        to = (move >> 6) & 63
+        flags = (move >> 12) & 15
+        from_bit = 1 << frm
+        to_bit = 1 << to
+
+        moved = squares[to]
+        code = piece_code(us, PAWN) if move >> 16 else moved
+        pieces[moved] ^= to_bit
+        pieces[code] ^= from_bit
+        occupied[us] ^= from_bit | to_bit
+        squares[frm] = code
+        squares[to] = 0
+        if (code & 7) == KING:
+            self.kings[us] = frm
+
+        if flags & CASTLE:
+            rook_from, rook_to = ((to + 1, to - 1) if to > frm
+                                  else (to - 2, to + 1))
+            rook_bits = (1 << rook_from) | (1 << rook_to)
+            pieces[piece_code(us, ROOK)] ^= rook_bits
+            occupied[us] ^= rook_bits
+            squares[rook_from] = squares[rook_to]
+            squares[rook_to] = 0
+
+        if flags & EN_PASSANT:
+            victim = to + 8 if us == WHITE else to - 8
+            pieces[captured] ^= 1 << victim
+            occupied[them] ^= 1 << victim
+            squares[victim] = captured
+        elif captured:
+            pieces[captured] ^= to_bit
+            occupied[them] ^= to_bit
+            squares[to] = captured
+
+        self.castling = castling
+        self.ep = ep
+        self.halfmove = halfmove
+        self.key = key
+        if us == BLACK:
+            self.fullmove -= 1
+        self.side = us
+        return move
+
+    def make_null_move(self):
+        """Passes the turn to the other side without moving a piece.
+
+        Used by the search to see if a position is so good that even passing
+        keeps it good. The undo record holds 0 for the move, and the halfmove
+        clock starts again so no repetition is counted across the pass.
+        """
+        key = self.key
+        self.history.append((0, 0, self.castling, self.ep, self.halfmove, key))
+        if self.ep >= 0:
+            key ^= ZOBRIST_EP_FILES[self.ep % 8]
+            self.ep = -1
+        self.halfmove = 0
+        if self.side == BLACK:
+            self.fullmove += 1
+        self.side ^= 1
+        self.key = key ^ ZOBRIST_BLACK
+
+    def unmake_null_move(self):
+        """Takes back a pass made with make_null_move."""
+        move, captured, castling, ep, halfmove, key = self.history.pop()
+        self.ep = ep
+        self.halfmove = halfmove
+        self.key = key
+        self.side ^= 1
+        if self.side == BLACK:
+            self.fullmove -= 1
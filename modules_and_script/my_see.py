@@ -0,0 +1,142 @@
+"""Static exchange evaluation (SEE).
+
+SEE works out what a capture wins once every piece that can join in has
+recaptured on the same square, each side taking with its least valuable
+piece first and stopping when going on would lose. It only reads the
+position's bitboards and makes no moves, so it is cheap enough to run on
+every capture of a search, or on every piece to find the hanging ones.
+Pins are not taken into account.
+"""
+from my_bitboards import (WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+    piece_code, squares_of, rook_attacks, bishop_attacks)
+from my_position import EN_PASSANT
+
+SEE_VALUES = [0, 100, 320, 330, 500, 900, 20000]
+
+
+def least_valuable(position, attackers, side):
+    """Finds the cheapest of a side's pieces in a set of attackers.
+
+    Args:
+        position(Position): The position.
+        attackers(int): Bitboard of attacking pieces.
+        side(int): The color whose attacker to find.
+
+    Returns:
+        tuple: (bitboard of the one piece, its piece type), or (0, 0) if the
+               side has no attacker.
+    """
+    for piece_type in (PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING):
+        found = attackers & position.pieces[piece_code(side, piece_type)]
+        if found:
+            return found & -found, piece_type
+    return 0, 0
+
+
+def exchange(position, sq, side, occupied, captured_value, attacker_value):
+    """Plays out the captures on a square after a first one.
+
+    Args:
+        position(Position): The position.
+        sq(int): The square captured on.
+        side(int): The color that recaptures next.
+        occupied(int): Occupied squares after the first capture.
+        captured_value(int): The value of the piece the first capture took.
+        attacker_value(int): The value of the piece now on the square.
+
+    Returns:
+        int: What the first capture wins, once both sides stop at the best
+             moment for them.
+    """
+    pieces = position.pieces
+    rooks = (pieces[piece_code(WHITE, ROOK)] | pieces[piece_code(BLACK, ROOK)]
+             | pieces[piece_code(WHITE, QUEEN)] | pieces[piece_code(BLACK, QUEEN)])
+    bishops = (pieces[piece_code(WHITE, BISHOP)] | pieces[piece_code(BLACK, BISHOP)]
+               | pieces[piece_code(WHITE, QUEEN)] | pieces[piece_code(BLACK, QUEEN)])
+    attackers = ((position.attackers(sq, WHITE, occupied)
+                  | position.attackers(sq, BLACK, occupied)) & occupied)
+
+    # gains[i] is the material the side making capture i has won so far,
+    # if the other side stops there
+    gains = [captured_value]
+    while True:
+        attacker, piece_type = least_valuable(position, attackers, side)
+        if not attacker:
+            break
+        if piece_type == KING and attackers & position.occupied[side ^ 1]:
+            # The king can't take a defended piece
+            break
+        gains.append(attacker_value - gains[-1])
+        attacker_value = SEE_VALUES[piece_type]
+        occupied ^= attacker
+        # Sliders lined up behind the piece that just took join in
+        attackers |= ((rook_attacks(sq, occupied) & rooks)
+                      | (bishop_attacks(sq, occupied) & bishops))
+        attackers &= occupied
+        side ^= 1
+
+    # Each side only takes back if it doesn't lose by it
+    for i in range(len(gains) - 1, 0, -1):
+        gains[i - 1] = -max(-gains[i - 1], gains[i])
+    return gains[0]
+
+
+def see(position, move):
+    """Works out the material a move wins once all captures on its square
+    are played out.
+
+    Args:
+        position(Position): The position before the move.
+        move(int): An encoded move of the side to move. Quiet moves score
+                   what the piece loses if the opponent takes it.
+
+    Returns:
+        int: The material won in centipawns, negative if it loses material.
+    """
+    frm = move & 63
+    to = (move >> 6) & 63
+    squares = position.squares
+    occupied = (position.occupied[WHITE] | position.occupied[BLACK]) ^ (1 << frm)
+    if (move >> 12) & EN_PASSANT:
+        victim = to + 8 if position.side == WHITE else to - 8
+        occupied ^= 1 << victim
+        captured_value = SEE_VALUES[PAWN]
+    else:
+        captured_value = SEE_VALUES[squares[to] & 7]
+    occupied |= 1 << to
+
+    attacker_value = SEE_VALUES[squares[frm] & 7]
+    promotion = move >> 16
+    if promotion:
+        captured_value += SEE_VALUES[promotion] - SEE_VALUES[PAWN]
+        attacker_value = SEE_VALUES[promotion]
+    return exchange(position, to, position.side ^ 1, occupied, captured_value,
+                    attacker_value)
+
+
+def hanging_pieces(position, color):
+    """Finds the pieces of a color the opponent could win material by taking.
+
+    Args:
+        position(Position): The position.
+        color(int): The color whose pieces to check (WHITE or BLACK).
+
+    Returns:
+        int: Bitboard of the pieces that lose material to a capture.
+    """
+    occupied = position.occupied[WHITE] | position.occupied[BLACK]
+    hanging = 0
+    for sq in squares_of(position.occupied[color]):
+        piece_type = position.squares[sq] & 7
+        if piece_type == KING:
+            continue
+        attackers = position.attackers(sq, color ^ 1, occupied)
+        if not attackers:
+            continue
+        attacker, attacker_type = least_valuable(position, attackers, color ^ 1)
+        if attacker_type == KING and position.attackers(sq, color, occupied):
+            continue
+        if exchange(position, sq, color, occupied ^ attacker,
+                    SEE_VALUES[piece_type], SEE_VALUES[attacker_type]) > 0:
+            hanging |= 1 << sq
+    return hanging
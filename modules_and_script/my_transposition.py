@@ -0,0 +1,214 @@
+"""Transposition table: a fixed size store of search results by Zobrist key.
+
+The table is one preallocated array of 64-bit words, so its memory use is set
+when it is made and never grows. It can also live in a buffer shared between
+processes, such as a multiprocessing.shared_memory block, so that several
+searches fill and read the same table without locks. Entries sit in buckets
+of two. Each entry is two words, the position's key XORed with the data word,
+and a packed data word:
+
+    bits  0-19  best move (0 if none)
+    bits 20-35  score, offset by 32768
+    bits 36-43  search depth
+    bits 44-45  bound type (EXACT, LOWER or UPPER, never 0)
+    bits 46-53  age, the search the entry was stored in
+
+An entry only matches a key if both of its words were written together, so
+an entry that another process was half way through writing is a miss.
+"""
+from array import array
+
+# Bound types. A score is exact, or only a lower or upper bound on the real
+# score when the search cut off.
+EXACT = 1
+LOWER = 2
+UPPER = 3
+
+ENTRY_BYTES = 16
+BUCKET_SIZE = 2
+SCORE_OFFSET = 32768
+MOVE_MASK = (1 << 20) - 1
+MAX_DEPTH = 255
+
+
+def table_bytes(megabytes):
+    """Returns the bytes a table uses for a memory budget: the largest power
+    of two of buckets that fits in it."""
+    buckets = 1
+    while buckets * 2 * BUCKET_SIZE * ENTRY_BYTES <= megabytes * 1024 * 1024:
+        buckets *= 2
+    return buckets * BUCKET_SIZE * ENTRY_BYTES
+
+
+def pack_entry(move, score, depth, bound, age):
+    """Packs the data of one entry into a 64-bit int.
+
+    Args:
+        move(int): The encoded best move, or 0.
+        score(int): The score, between -32768 and 32767.
+        depth(int): The depth searched, between 0 and 255.
+        bound(int): EXACT, LOWER or UPPER.
+        age(int): The search the entry belongs to, between 0 and 255.
+
+    Returns:
+        int: The packed data word.
+    """
+    return (move | ((score + SCORE_OFFSET) << 20) | (depth << 36)
+            | (bound << 44) | (age << 46))
+
+
+def unpack_entry(data):
+    """Unpacks a data word made by pack_entry.
+
+    Returns:
+        tuple: (move, score, depth, bound) of the entry.
+    """
+    return (data & MOVE_MASK, ((data >> 20) & 0xFFFF) - SCORE_OFFSET,
+            (data >> 36) & 0xFF, (data >> 44) & 3)
+
+
+class TranspositionTable():
+    """Stores the best move, score, depth and bound of searched positions.
+
+    When a bucket is full, a new entry replaces the one that is least worth
+    keeping: entries from earlier searches lose 8 plies of depth for each
+    search they are behind, and the shallowest one goes. A position already
+    stored keeps a deeper entry of the current search, unless the new result
+    is exact; only its best move is updated.
+
+    Args:
+        megabytes(float): The memory budget. The table uses the largest power
+                          of two of buckets that fits in it.
+        buffer(buffer): Memory to keep the table in, of at least
+                        table_bytes(megabytes) bytes, instead of a new array.
+                        Its contents are used as they are, so a new buffer
+                        should be zeroed.
+
+    Attributes:
+        buckets(int): The number of buckets.
+        words(array): The entries, two 64-bit words each, as an array or a
+                      memoryview of the buffer.
+        age(int): The number of the current search, between 0 and 255.
+        hits(int): Probes that found their position.
+        misses(int): Probes that didn't.
+        collisions(int): Misses where the bucket was full of other positions.
+    """
+
+    def __init__(self, megabytes = 16, buffer = None):
+        size = table_bytes(megabytes)
+        self.buckets = size // (BUCKET_SIZE * ENTRY_BYTES)
+        if buffer is None:
+            self.words = array('Q', bytes(size))
+        else:
+            self.words = memoryview(buffer)[:size].cast('Q')
+        self.age = 0
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+
+    def clear(self):
+        """Empties the table and resets the counters."""
+        memoryview(self.words).cast('B')[:] = bytes(len(self.words) * 8)
+        self.age = 0
+        self.reset_stats()
+
+    def release(self):
+        """Lets go of a shared buffer, so its owner can close it."""
+        if isinstance(self.words, memoryview):
+            self.words.release()
+
+    def reset_stats(self):
+        """Sets the hit, miss and collision counters back to zero."""
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+
+    def new_search(self):
+        """Starts a new search, so the entries already stored count as old."""
+        self.age = (self.age + 1) & 255
+
+    def probe(self, key):
+        """Looks up a position.
+
+        Args:
+            key(int): The Zobrist key of the position.
+
+        Returns:
+            tuple: (move, score, depth, bound) if the position is stored,
+                   otherwise None.
+        """
+        words = self.words
+        start = (key & (self.buckets - 1)) * 2 * BUCKET_SIZE
+        for i in range(start, start + 2 * BUCKET_SIZE, 2):
+            data = words[i + 1]
+            if data and words[i] ^ data == key:
+                self.hits += 1
+                return unpack_entry(data)
+        self.misses += 1
+        if words[start + 2 * BUCKET_SIZE - 1]:
+            self.collisions += 1
+        return None
+
+    def store(self, key, move, score, depth, bound):
+        """Stores the result of searching a position.
+
+        Args:
+            key(int): The Zobrist key of the position.
+            move(int): The best move found, or 0 to keep any stored one.
+            score(int): The score.
+            depth(int): The depth searched.
+            bound(int): EXACT, LOWER or UPPER.
+        """
+        words = self.words
+        start = (key & (self.buckets - 1)) * 2 * BUCKET_SIZE
+        depth = min(max(depth, 0), MAX_DEPTH)
+        replace = start
+        lowest = None
+        for i in range(start, start + 2 * BUCKET_SIZE, 2):
+            data = words[i + 1]
+            if not data:
+                replace = i
+                break
+            if words[i] ^ data == key:
+                if (data >> 46 == self.age and (data >> 36) & 0xFF > depth
+                        and bound != EXACT):
+                    # A deeper result of this search is worth more than a
+                    # shallower bound, but a new best move is still kept
+                    if move:
+                        data = data & ~MOVE_MASK | move
+                        words[i] = key ^ data
+                        words[i + 1] = data
+                    return
+                if not move:
+                    move = data & MOVE_MASK
+                replace = i
+                break
+            worth = ((data >> 36) & 0xFF) - 8 * ((self.age - (data >> 46)) & 255)
+            if lowest is None or worth < lowest:
+                lowest = worth
+                replace = i
+        data = pack_entry(move, score, depth, bound, self.age)
+        words[replace] = key ^ data
+        words[replace + 1] = data
+
+    def hashfull(self):
+        """Returns how full the table is, in entries per thousand.
+
+        Only the first thousand buckets (or all of them, if fewer) are
+        counted, and only entries of the current search.
+        """
+        words = self.words
+        sampled = min(self.buckets, 1000) * BUCKET_SIZE
+        used = 0
+        for i in range(1, sampled * 2, 2):
+            if words[i] and (words[i] >> 46) == self.age:
+                used += 1
+        return used * 1000 // sampled
+
+    def stats(self):
+        """Returns the counters as a dict, with the hit rate."""
+        probes = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'collisions': self.collisions,
+                'hit_rate': self.hits / probes if probes else 0.0,
+                'hashfull': self.hashfull()}
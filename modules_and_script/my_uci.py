@@ -0,0 +1,270 @@
+"""Universal Chess Interface (UCI) front end for the engine.
+
+UCI lets chess GUIs, tournament managers and scripts run the engine: they
+write commands to its standard input and read its answers from its standard
+output. It only needs the engine and Position, not the window, so it never
+imports tkinter:
+
+    python my_uci.py
+
+The commands understood are uci, isready, ucinewgame, setoption (Hash),
+position (startpos or fen, then moves), go (depth, nodes, movetime, wtime,
+btime, winc, binc, movestogo, infinite), stop and quit. The search runs on a
+thread of its own, so stop and isready are answered while it searches. An
+info line is written after each iteration, then bestmove when it ends.
+"""
+import sys
+import threading
+from my_bitboards import WHITE
+from my_engine import Engine, MATE, MATE_BOUND
+from my_position import Position, move_name
+
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+# Moves assumed left in the game when the GUI doesn't say
+MOVES_TO_GO = 30
+# Milliseconds kept back on each move for the GUI and pipes
+MOVE_OVERHEAD = 50
+
+
+def uci_score(score):
+    """Returns a score as UCI writes it, such as 'cp 35' or 'mate -2'.
+
+    Args:
+        score(int): The score in centipawns for the side to move.
+
+    Returns:
+        str: 'cp' and the centipawns, or 'mate' and the moves to mate,
+             negative if the side to move is being mated.
+    """
+    if score > MATE_BOUND:
+        return 'mate %d' % ((MATE - score + 1) // 2)
+    if score < -MATE_BOUND:
+        return 'mate -%d' % ((MATE + score + 1) // 2)
+    return 'cp %d' % score
+
+
+def parse_move(position, name):
+    """Finds the legal move with a name in coordinate notation.
+
+    Args:
+        position(Position): The position the move is played in.
+        name(str): The move, such as 'e2e4' or 'e7e8q'.
+
+    Returns:
+        int: The encoded move, or 0 if no legal move has that name.
+    """
+    for move in position.legal_moves():
+        if move_name(move) == name:
+            return move
+    return 0
+
+
+def think_time(position, limits):
+    """Works out how long to search for a move from the clock.
+
+    Args:
+        position(Position): The position to move in.
+        limits(dict): The numbers given to go, by name.
+
+    Returns:
+        float: The seconds to search, or None if there is no clock.
+    """
+    if 'movetime' in limits:
+        return limits['movetime'] / 1000
+    left = limits.get('wtime' if position.side == WHITE else 'btime')
+    if left is None:
+        return None
+    increment = limits.get('winc' if position.side == WHITE else 'binc', 0)
+    moves = limits.get('movestogo') or MOVES_TO_GO
+    budget = min(left / moves + increment * 3 / 4, left / 2)
+    return max(budget - MOVE_OVERHEAD, 1) / 1000
+
+
+class UciEngine():
+    """Answers UCI commands, one line at a time.
+
+    Args:
+        write(function): Called with each line to send, without its newline.
+        hash_mb(float): The memory budget of the transposition table.
+
+    Attributes:
+        engine(Engine): The engine searching.
+        position(Position): The position set by the last position command.
+        thread(Thread): The search running, or None.
+        stop_event(Event): Set to stop the search.
+        infinite(bool): True if the search may only end with stop.
+    """
+
+    def __init__(self, write = None, hash_mb = 16):
+        self.write = write or self.print_line
+        self.lock = threading.Lock()
+        self.engine = Engine(hash_mb)
+        self.stop_event = threading.Event()
+        self.engine.should_stop = self.stop_event.is_set
+        self.position = Position.from_fen(START_FEN)
+        self.thread = None
+        self.infinite = False
+
+    def print_line(self, line):
+        """Writes a line to standard output at once."""
+        sys.stdout.write(line + '\n')
+        sys.stdout.flush()
+
+    def send(self, line):
+        """Sends a line, keeping lines from the search thread whole."""
+        with self.lock:
+            self.write(line)
+
+    def handle(self, line):
+        """Carries out one command.
+
+        Args:
+            line(str): The command, as read from the GUI.
+
+        Returns:
+            bool: False once the command was quit, True otherwise.
+        """
+        words = line.split()
+        if not words:
+            return True
+        command = words[0]
+        if command == 'uci':
+            self.send('id name Cogs18 Chess')
+            self.send('id author Vladimir Melnik')
+            self.send('option name Hash type spin default 16 min 1 max 1024')
+            self.send('uciok')
+        elif command == 'isready':
+            self.send('readyok')
+        elif command == 'ucinewgame':
+            self.stop()
+            self.engine.table.clear()
+        elif command == 'setoption':
+            self.set_option(words[1:])
+        elif command == 'position':
+            self.stop()
+            self.set_position(words[1:])
+        elif command == 'go':
+            self.stop()
+            self.go(words[1:])
+        elif command == 'stop':
+            self.stop()
+        elif command == 'quit':
+            self.stop()
+            return False
+        return True
+
+    def set_option(self, words):
+        """Carries out 'setoption name <name> value <value>'."""
+        if 'value' not in words:
+            return
+        split = words.index('value')
+        name = ' '.join(words[1:split]).lower()
+        if name == 'hash':
+            self.stop()
+            self.engine = Engine(float(words[split + 1]))
+            self.engine.should_stop = self.stop_event.is_set
+
+    def set_position(self, words):
+        """Carries out 'position startpos|fen <fen> [moves <move> ...]'.
+
+        Moves that aren't legal are reported, and the ones after them are
+        left out.
+        """
+        if 'moves' in words:
+            split = words.index('moves')
+            setup, moves = words[:split], words[split + 1:]
+        else:
+            setup, moves = words, []
+        if setup and setup[0] == 'fen':
+            position = Position.from_fen(' '.join(setup[1:]))
+        else:
+            position = Position.from_fen(START_FEN)
+        for name in moves:
+            move = parse_move(position, name)
+            if not move:
+                self.send('info string illegal move %s' % name)
+                break
+            position.make_move(move)
+        self.position = position
+
+    def go(self, words):
+        """Starts searching the position on the search thread.
+
+        Args:
+            words(list): The words after go, such as ['depth', '6'].
+        """
+        limits = {}
+        for i, word in enumerate(words[:-1]):
+            if word in ('depth', 'nodes', 'movetime', 'wtime', 'btime',
+                        'winc', 'binc', 'movestogo'):
+                limits[word] = int(words[i + 1])
+        self.infinite = 'infinite' in words
+        movetime = None if self.infinite else think_time(self.position, limits)
+        self.stop_event.clear()
+        # The search makes its moves on a copy, so a position command can
+        # replace self.position at any time
+        position = self.position.copy()
+        position.history = list(self.position.history)
+        self.thread = threading.Thread(
+            target = self.search,
+            args = (position, limits.get('depth'), limits.get('nodes'),
+                    movetime))
+        self.thread.start()
+
+    def search(self, position, depth, nodes, movetime):
+        """Searches a position, writing info lines and then the best move."""
+        result = self.engine.search(position, depth, nodes, movetime,
+                                    callback = self.info)
+        if self.infinite:
+            # The GUI decides when an infinite search ends
+            self.stop_event.wait()
+        if not result.move:
+            self.send('bestmove 0000')
+        elif len(result.pv) > 1:
+            self.send('bestmove %s ponder %s' % (move_name(result.pv[0]),
+                                                 move_name(result.pv[1])))
+        else:
+            self.send('bestmove %s' % move_name(result.move))
+
+    def info(self, result):
+        """Writes an info line for a finished iteration."""
+        self.send('info depth %d score %s nodes %d nps %d time %d hashfull %d '
+                  'pv %s' % (result.depth, uci_score(result.score),
+                             result.nodes, result.nps(), result.time * 1000,
+                             self.engine.table.hashfull(),
+                             ' '.join(move_name(move) for move in result.pv)))
+
+    def stop(self):
+        """Stops the search, and waits for its best move to be written."""
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+
+    def finish(self):
+        """Waits for the search to end by itself, unless it is infinite."""
+        if self.infinite:
+            self.stop()
+        elif self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+
+def main(input_lines = None, hash_mb = 16):
+    """Reads UCI commands until quit or the end of the input.
+
+    Args:
+        input_lines(iterable): The command lines, standard input by default.
+        hash_mb(float): The memory budget of the transposition table.
+    """
+    uci = UciEngine(hash_mb = hash_mb)
+    for line in input_lines if input_lines is not None else sys.stdin:
+        if not uci.handle(line):
+            return
+    # Piped commands can end before the search does
+    uci.finish()
+
+
+if __name__ == '__main__':
+    main()
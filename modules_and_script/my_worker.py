@@ -0,0 +1,182 @@
+"""Engine searches in the background, for the GUI.
+
+Tk runs every click on one thread, so a search started from a click would
+freeze the window until it ends. EngineWorker runs searches on a thread of
+its own instead. The GUI hands it requests, which returns at once, and
+collects what it has found with poll(), called from the Tk loop through
+window.after.
+
+Only the newest request matters. A new request supersedes the one before
+it: a search still running for the old one is stopped at its next check,
+and whatever the old one already sent back is dropped by poll(), so a hint
+for a position no longer on the board is never shown.
+
+While the player thinks, the worker can ponder: search the position after
+the reply it expects. If the player makes that move, ponderhit() keeps the
+search instead of starting again, so the answer is ready as soon as it ends,
+often at once. Until then poll() holds its responses back, so they are never
+mistaken for an answer to the position on the board.
+"""
+import copy
+import queue
+import threading
+import time
+from my_engine import Engine
+
+# Kinds of response
+INFO = 'info'
+DONE = 'done'
+
+
+class EngineWorker():
+    """Runs engine searches on a background thread.
+
+    Args:
+        hash_mb(float): The memory budget of the engine's transposition
+                        table.
+
+    Attributes:
+        engine(Engine): The engine, only used by the worker thread.
+        current(int): The id of the newest request. Requests with another id
+                      are stale.
+        searching(int): The id of the request being searched.
+        pondered(tuple): (request id, Zobrist key) of the position being
+                         pondered, or None.
+        requests(Queue): Requests waiting for the thread.
+        responses(Queue): What the thread found, for poll() to collect.
+    """
+
+    def __init__(self, hash_mb = 16):
+        self.engine = Engine(hash_mb)
+        self.engine.should_stop = self.is_stale
+        self.current = 0
+        self.searching = 0
+        self.pondered = None
+        self.requests = queue.Queue()
+        self.responses = queue.Queue()
+        self.thread = threading.Thread(target = self.run, daemon = True)
+        self.thread.start()
+
+    def is_stale(self):
+        """Returns True if the search running is no longer wanted."""
+        return self.searching != self.current
+
+    def submit(self, position, depth = None, nodes = None, movetime = None):
+        """Asks for a search of a position, superseding any earlier request.
+
+        Args:
+            position(Position): The position. The worker searches a copy, so
+                                it can go on changing.
+            depth(int): The deepest iteration, in plies.
+            nodes(int): Stop after about this many positions.
+            movetime(float): Stop after about this many seconds.
+
+        Returns:
+            int: The id of the request.
+        """
+        own = position.copy()
+        own.history = list(position.history)
+        self.current += 1
+        self.pondered = None
+        self.requests.put((self.current, own, depth, nodes, movetime))
+        return self.current
+
+    def ponder(self, position, move, depth = None, nodes = None,
+               movetime = None):
+        """Searches the position after an expected move, superseding any
+        earlier request.
+
+        Args:
+            position(Position): The position before the move.
+            move(int): The move expected to be played.
+            depth(int): The deepest iteration, in plies.
+            nodes(int): Stop after about this many positions.
+            movetime(float): Stop after about this many seconds.
+
+        Returns:
+            int: The id of the request.
+        """
+        expected = position.copy()
+        expected.history = list(position.history)
+        expected.make_move(move)
+        request_id = self.submit(expected, depth, nodes, movetime)
+        self.pondered = (request_id, expected.key)
+        return request_id
+
+    def ponderhit(self, position):
+        """Keeps the pondering search if its position is the one reached.
+
+        Args:
+            position(Position): The position after the move actually played.
+
+        Returns:
+            bool: True if the pondering search is now the answer for the
+                  position, and poll() hands out its responses. False if
+                  the position was not expected, and it should be submitted.
+        """
+        hit = (self.pondered is not None and self.pondered[0] == self.current
+               and self.pondered[1] == position.key)
+        self.pondered = None
+        return hit
+
+    def cancel(self):
+        """Stops the running search, and drops every request so far."""
+        self.current += 1
+        self.pondered = None
+
+    def run(self):
+        """Searches the requests as they come, until close() is called."""
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            request_id, position, depth, nodes, movetime = request
+            if request_id != self.current:
+                # Superseded before it even started
+                continue
+            self.searching = request_id
+            # The search goes on changing its result, so each iteration's
+            # is sent as a copy
+            result = self.engine.search(
+                position, depth, nodes, movetime,
+                callback = lambda result: self.responses.put(
+                    (request_id, INFO, copy.copy(result))))
+            self.responses.put((request_id, DONE, result))
+
+    def poll(self, timeout = 0):
+        """Collects the responses of the newest request.
+
+        By default it never waits: call it from the GUI as often as needed.
+        While pondering, nothing is handed out until ponderhit().
+
+        Args:
+            timeout(float): Seconds to wait for a first response, if there is
+                            none yet. 0 to return at once.
+
+        Returns:
+            list: (kind, SearchResult) pairs in the order they were found,
+                  where kind is INFO after each finished iteration and DONE
+                  when the search ends. Empty if the time ran out.
+        """
+        found = []
+        if self.pondered is not None:
+            return found
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if found or timeout <= 0:
+                    response = self.responses.get_nowait()
+                else:
+                    response = self.responses.get(
+                        timeout = max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                return found
+            request_id, kind, result = response
+            if request_id == self.current:
+                found.append((kind, result))
+
+    def close(self):
+        """Stops the search and ends the thread."""
+        self.cancel()
+        self.requests.put(None)
+        self.thread.join()
@@ -1,8 +1,51 @@
-from my_classes import Piece
+import numpy as np
+import os
+import pytest
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from tkinter import TclError
+from my_bitboards import (WHITE, BLACK, PAWN, KNIGHT, QUEEN, piece_code,
+	KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, ROOK_DIRECTIONS, BISHOP_DIRECTIONS,
+	slider_attacks, rook_attacks, bishop_attacks, queen_attacks)
+from my_classes import Piece, King, Queen, Rook, Knight, Bishop, Pawn
+from my_position import (Position, ONGOING, CHECK, CHECKMATE, STALEMATE,
+	CAPTURE, EN_PASSANT, DOUBLE_PUSH, encode_move, square_from_name, move_flags, move_promotion)
+from my_transposition import TranspositionTable, EXACT, LOWER, UPPER
+from my_engine import Engine, MATE, SEARCH_OPTIONS, evaluate
+from my_ordering import (MoveOrderer, MovePicker, is_quiet, TABLE_MOVE,
+	GOOD_CAPTURES, KILLERS, QUIET_MOVES, BAD_CAPTURES)
+from my_see import see, hanging_pieces
+from my_parallel import ParallelSearch, helper_skip, search_worker, attached, detach
+from my_worker import EngineWorker, INFO, DONE
+from my_uci import UciEngine, uci_score, think_time
+from my_perft import (perft, divide, parallel_perft, make_executor,
+	REFERENCE_POSITIONS)
 
 test_piece = Piece('b','q')
 
 
+def make_start_board():
+	"""Builds a fresh board with every piece in its starting position."""
+	board = np.zeros((8,8))
+	board = np.array(board, dtype = object)
+	back_row = [Rook, Knight, Bishop, Queen, King, Bishop, Knight, Rook]
+	for col in range(8):
+		board[0, col] = back_row[col]('b')
+		board[1, col] = Pawn('b')
+		board[6, col] = Pawn('w')
+		board[7, col] = back_row[col]('w')
+	return board
+
+
+def legal_move(position, name):
+	"""Finds the legal move of a position from its squares, such as 'e2e4'."""
+	return [m for m in position.legal_moves()
+			if m & 4095 == square_from_name(name[:2]) | square_from_name(name[2:]) << 6][0]
+
+
 def test_in_board():
 	"""Test function that tests the in_board() method contained in the Piece class.
 	Args:
@@ -23,4 +66,983 @@ def test_in_board():
 	assert(not test_piece.in_board(8,8))
 
 
+
+def test_bitboard_moves():
+	"""Test function for the bitboard backed legal_moves and legal_takes.
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	board = make_start_board()
+
+	# A knight on the back row can only jump to the two squares in front
+	knight_moves = board[7, 1].legal_moves(7, 1, board)
+	assert(knight_moves.sum() == 2)
+	assert(knight_moves[5, 0] == 1 and knight_moves[5, 2] == 1)
+
+	# Pawns can move one or two squares on their first move
+	pawn_moves = board[6, 4].legal_moves(6, 4, board)
+	assert(pawn_moves[5, 4] == 1 and pawn_moves[4, 4] == 1)
+	assert(pawn_moves.sum() == 2)
+
+	# Nothing can be captured from the starting position
+	for col in range(8):
+		assert(not board[7, col].legal_takes(7, col, board).any())
+
+	# A Position with the other side to move is turned around with a key to
+	# match, as if it had been set up that way
+	position = Position.from_fen('4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 2')
+	turned = Pawn('b').to_position(position)
+	assert(turned.side == 1 and turned.ep == -1)
+	assert(turned.key == Position.from_fen('4k3/8/8/3pP3/8/8/8/4K3 b - - 0 2').key)
+	assert(position.key == Position.from_fen('4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 2').key)
+
+
+
+def test_pinned_piece():
+	"""Test function for pieces pinned to their king.
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	board = np.zeros((8,8))
+	board = np.array(board, dtype = object)
+	board[7, 4] = King('w')
+	board[5, 4] = Rook('w')
+	board[5, 2] = Knight('w')
+	board[0, 4] = Queen('b')
+	board[0, 0] = King('b')
+
+	# The rook can only move along the column, between the king and the queen
+	rook_moves = board[5, 4].legal_moves(5, 4, board)
+	assert(rook_moves.sum() == 5)
+	assert(rook_moves[:, 4].sum() == 5)
+	assert(board[5, 4].legal_takes(5, 4, board)[0, 4] == 1)
+
+	# The knight isn't pinned, so it keeps all of its moves
+	assert(board[5, 2].legal_moves(5, 2, board).sum() == 8)
+
+
+def test_attack_tables():
+	"""Test function for the knight, king and pawn attack tables, and the piece
+	functions that look them up.
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	def targets(rw, cl, steps):
+		found = 0
+		for d_rw, d_cl in steps:
+			if 0 <= rw + d_rw < 8 and 0 <= cl + d_cl < 8:
+				found |= 1 << ((rw + d_rw)*8 + cl + d_cl)
+		return found
+
+	knight_steps = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+	king_steps = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+	for rw in range(8):
+		for cl in range(8):
+			sq = rw*8 + cl
+			assert(KNIGHT_ATTACKS[sq] == targets(rw, cl, knight_steps))
+			assert(KING_ATTACKS[sq] == targets(rw, cl, king_steps))
+			# White pawns move up the board, towards row 0
+			assert(PAWN_ATTACKS[WHITE][sq] == targets(rw, cl, [(-1, -1), (-1, 1)]))
+			assert(PAWN_ATTACKS[BLACK][sq] == targets(rw, cl, [(1, -1), (1, 1)]))
+
+	# The lookups give the same squares from a board or a Position
+	board = np.zeros((8,8))
+	board = np.array(board, dtype = object)
+	board[7, 4] = King('w')
+	board[5, 5] = Knight('w')
+	board[4, 4] = Pawn('w')
+	board[6, 3] = Pawn('w')
+	board[3, 3] = Rook('b')
+	board[3, 6] = Knight('b')
+	board[6, 4] = Bishop('b')
+	board[0, 0] = King('b')
+	position = Position.from_board(board, 'w')
+	knight = board[5, 5]
+	assert(knight.avail_knight_moves(5, 5, board).sum() == 5)
+	assert(knight.avail_knight_takes(5, 5, board)[3, 6] == 1)
+	assert(knight.avail_knight_takes(5, 5, board).sum() == 1)
+	king = board[7, 4]
+	assert(king.avail_king_takes(7, 4, board)[6, 4] == 1)
+	assert(king.avail_king_moves(7, 4, board).sum() == 3)
+	assert(board[4, 4].avail_pawn_takes(4, 4, board)[3, 3] == 1)
+	assert(board[6, 3].avail_pawn_moves(6, 3, board).sum() == 2)
+	for piece, rw, cl, name in [(knight, 5, 5, 'knight'), (king, 7, 4, 'king'),
+	                            (board[4, 4], 4, 4, 'pawn'), (board[6, 3], 6, 3, 'pawn')]:
+		for kind in ['moves', 'takes']:
+			function = getattr(piece, 'avail_%s_%s' % (name, kind))
+			assert(np.array_equal(function(rw, cl, board), function(rw, cl, position)))
+
+
+def test_magic_attacks():
+	"""Test function for the magic bitboard lookups of rook, bishop and queen
+	attacks.
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	rng = random.Random(18)
+	# Sparse, half full and crowded boards
+	occupancies = [0, (1 << 64) - 1]
+	for density in [8, 2, 1]:
+		for sample in range(20):
+			occupied = (1 << 64) - 1
+			for i in range(density):
+				occupied &= rng.getrandbits(64)
+			occupancies.append(occupied)
+	for occupied in occupancies:
+		for sq in range(64):
+			rook = slider_attacks(sq, occupied, ROOK_DIRECTIONS)
+			bishop = slider_attacks(sq, occupied, BISHOP_DIRECTIONS)
+			assert(rook_attacks(sq, occupied) == rook)
+			assert(bishop_attacks(sq, occupied) == bishop)
+			assert(queen_attacks(sq, occupied) == rook | bishop)
+
+
+def test_check_move():
+	"""Test function for Piece.check(), which tests a move for leaving the king
+	in check.
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	# En passant would take both pawns off the row, leaving the king to the rook
+	position = Position.from_fen('8/8/8/K2pP2r/8/8/8/7k w - d6 0 2')
+	pawn = Pawn('w')
+	assert(pawn.check(3, 4, 2, 4, position) == 1)
+	assert(pawn.check(3, 4, 2, 3, position) == 0)
+	board = Pawn('w').legal_check(3, 4, np.ones((8,8)), position)
+	assert(board.sum() == 1 and board[2, 4] == 1)
+
+	# Castling may not pass through the rook's attack on f1
+	position = Position.from_fen('5r1k/8/8/8/8/8/8/4K2R w K - 0 1')
+	king = King('w')
+	assert(king.check(7, 4, 7, 6, position) == 0)
+	assert(king.check(7, 4, 7, 3, position) == 1)
+	assert(king.check(7, 4, 7, 5, position) == 0)
+	# Staying put only asks whether the king is in check now
+	assert(king.check(7, 4, 7, 4, position) == 1)
+
+
+
+def test_make_unmake_move():
+	"""Test function for Position.make_move() and Position.unmake_move().
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	position = Position.from_board(make_start_board(), 'w')
+	start = (list(position.pieces), list(position.occupied), list(position.kings),
+			 position.side, position.castling, position.ep)
+	start_bytes = position.to_bytes()
+
+	# Plays two moves deep from every square, and takes every move back
+	check_mask, pins = position.check_and_pins()
+	for sq in range(48, 64):
+		for move in position.legal_moves_from(sq, check_mask, pins):
+			position.make_move(move)
+			reply_mask, reply_pins = position.check_and_pins()
+			for reply_sq in range(16):
+				for reply in position.legal_moves_from(reply_sq, reply_mask, reply_pins):
+					position.make_move(reply)
+					position.unmake_move()
+			position.unmake_move()
+			assert((list(position.pieces), list(position.occupied), list(position.kings),
+					position.side, position.castling, position.ep) == start)
+			assert(position.to_bytes() == start_bytes)
+	assert(position.history == [])
+	assert(Position.from_bytes(start_bytes) == position)
+	assert(position.kings == [60, 4])
+
+	# Positions change in place, so they are indexed by their key, not hashed
+	try:
+		hash(position)
+		assert(False)
+	except TypeError:
+		pass
+	seen = {position.key: 'start'}
+	position.make_move(position.legal_moves()[0])
+	assert(position.key not in seen)
+	position.unmake_move()
+	assert(seen[position.key] == 'start')
+
+
+
+def gui_functions():
+	"""Imports my_functions, which needs a display for its Tk buttons.
+
+	Returns:
+		module: my_functions. The calling test is skipped without a display.
+	"""
+	try:
+		import my_functions
+	except TclError:
+		pytest.skip('no display for the Tk window')
+	return my_functions
+
+
+def test_castling_rights():
+	"""Test function for castling rights being lost by king and rook moves.
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	position = Position.from_fen('r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1')
+	position.make_move(encode_move(square_from_name('h1'), square_from_name('h2')))
+	assert(position.fen().split()[2] == 'Qkq')
+	position.make_move(encode_move(square_from_name('e8'), square_from_name('e7')))
+	assert(position.fen().split()[2] == 'Q')
+	# Moving the rook back does not give the right back
+	position.make_move(encode_move(square_from_name('h2'), square_from_name('h1')))
+	assert(position.fen().split()[2] == 'Q')
+	position.unmake_move()
+	position.unmake_move()
+	position.unmake_move()
+	assert(position.fen().split()[2] == 'KQkq')
+
+	# A rook taken on its home square loses its right too
+	position.make_move(encode_move(square_from_name('a1'), square_from_name('a8'), CAPTURE))
+	assert(position.fen().split()[2] == 'Kk')
+
+
+def test_en_passant():
+	"""Test function for en passant only being allowed right after the double
+	push.
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	position = Position.from_fen('4k3/3p3p/8/4P3/8/8/7P/4K3 b - - 0 1')
+	position.make_move(encode_move(square_from_name('d7'), square_from_name('d5'), DOUBLE_PUSH))
+	capture = [move for move in position.legal_moves() if move_flags(move) & EN_PASSANT]
+	assert(len(capture) == 1)
+	assert(capture[0] & 4095 == square_from_name('e5') | square_from_name('d6') << 6)
+
+	# One move later, it is gone
+	position.make_move(encode_move(square_from_name('h2'), square_from_name('h3')))
+	position.make_move(encode_move(square_from_name('h7'), square_from_name('h6')))
+	assert(not any(move_flags(move) & EN_PASSANT for move in position.legal_moves()))
+
+
+def test_gui_moves():
+	"""Test function for castling, en passant and promotion through move_to()
+	and promote(), as the buttons play them.
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	functions = gui_functions()
+
+	# Castling moves the rook, and the king's moves lose both rights
+	position = Position.from_fen('r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1')
+	functions.move_to(7, 4, 7, 6, position, drw = False)
+	assert(position.fen().split()[:3] == ['r3k2r/8/8/8/8/8/8/R4RK1', 'b', 'kq'])
+	functions.move_to(0, 0, 0, 1, position, drw = False)
+	assert(position.fen().split()[2] == 'k')
+
+	# A click between two squares with no legal move changes nothing
+	fen = position.fen()
+	assert(functions.move_to(0, 4, 4, 4, position, drw = False) is position)
+	assert(position.fen() == fen)
+
+	# En passant can be clicked right after the double push, and not later
+	position = Position.from_fen('4k3/3p3p/8/4P3/8/8/7P/4K3 b - - 0 1')
+	functions.move_to(1, 3, 3, 3, position, drw = False)
+	functions.move_to(3, 4, 2, 3, position, drw = False)
+	assert(position.squares[square_from_name('d5')] == 0)
+	assert(position.squares[square_from_name('d6')] == piece_code(WHITE, PAWN))
+
+	position = Position.from_fen('4k3/3p3p/8/4P3/8/8/7P/4K3 b - - 0 1')
+	functions.move_to(1, 3, 3, 3, position, drw = False)
+	functions.move_to(6, 7, 5, 7, position, drw = False)
+	functions.move_to(1, 7, 2, 7, position, drw = False)
+	fen = position.fen()
+	functions.move_to(3, 4, 2, 3, position, drw = False)
+	assert(position.fen() == fen)
+
+	# The pawn is a queen until promote() replays the move with a knight
+	position = Position.from_fen('8/1P6/8/8/8/8/8/k3K3 w - - 0 1')
+	functions.move_to(1, 1, 0, 1, position, drw = False)
+	assert(position.squares[1] == piece_code(WHITE, QUEEN))
+	functions.promote(0, 1, 'n', position)
+	assert(position.squares[1] == piece_code(WHITE, KNIGHT))
+	assert(len(position.history) == 1)
+	assert(move_promotion(position.history[-1][0]) == KNIGHT)
+	position.unmake_move()
+	assert(position.fen() == '8/1P6/8/8/8/8/8/k3K3 w - - 0 1')
+
+
+def test_hint_on_request():
+	"""Test function for engine hints, which are only worked out when asked for.
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	functions = gui_functions()
+	functions.engine_side = None
+	functions.reset_board()
+	assert(functions.engine_task is None)
+
+	functions.request_hint(functions.current_position)
+	assert(functions.engine_task == 'hint')
+	# Drawing a board, as a move does, stops the hint for the old one
+	functions.draw()
+	assert(functions.engine_task is None)
+	assert(functions.engine_worker.is_stale())
+
+
+def test_legal_move_list():
+	"""Test function for Position.legal_moves(), which lists the whole side.
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	position = Position.from_board(make_start_board(), 'w')
+	moves = position.legal_moves()
+	assert(len(moves) == 20)
+
+	# The list holds the same moves as asking every square on its own
+	by_square = []
+	for sq in range(64):
+		by_square += position.legal_moves_from(sq)
+	assert(sorted(moves) == sorted(by_square))
+
+
+
+def test_game_status():
+	"""Test function for Position.game_status() and has_legal_move().
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	position = Position.from_board(make_start_board(), 'w')
+	assert(position.game_status() == ONGOING)
+	assert(position.has_legal_move())
+
+	board = np.zeros((8,8))
+	board = np.array(board, dtype = object)
+	board[0, 0] = King('b')
+	board[2, 2] = King('w')
+	board[1, 1] = Queen('w')
+	position = Position.from_board(board, 'b')
+	assert(position.game_status() == CHECKMATE)
+	assert(not position.has_legal_move())
+
+	# With the queen a knight's jump away, the king has no moves and no check
+	board[1, 1] = 0
+	board[2, 2] = 0
+	board[1, 2] = Queen('w')
+	board[7, 7] = King('w')
+	position = Position.from_board(board, 'b')
+	assert(position.game_status() == STALEMATE)
+	assert(not position.has_legal_move())
+
+	board[1, 2] = 0
+	board[0, 7] = Rook('w')
+	position = Position.from_board(board, 'b')
+	assert(position.game_status() == CHECK)
+	assert(position.has_legal_move())
+
+
+def test_perft():
+	"""Test function for perft() and divide(), against known node counts.
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	position = Position.from_board(make_start_board(), 'w')
+	before = position.to_bytes()
+	assert(perft(position, 3) == 8902)
+	assert(position.to_bytes() == before)
+
+	# Kiwipete has castling, en passant and promotions in its tree
+	name, fen, counts = REFERENCE_POSITIONS[1]
+	position = Position.from_fen(fen)
+	split = divide(position, 2)
+	assert(len(split) == counts[0])
+	assert(sum(nodes for move, nodes in split) == counts[1])
+
+	# Splitting the root moves over worker processes gives the same count
+	assert(parallel_perft(position, 3, workers = 2) == counts[2])
+	assert(position.to_bytes() == Position.from_fen(fen).to_bytes())
+
+
+def test_zobrist_key():
+	"""Test function for the Zobrist key kept by make_move and unmake_move.
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	# Kiwipete has castling, en passant and promotions two moves deep
+	position = Position.from_fen(REFERENCE_POSITIONS[1][1])
+	start_key = position.key
+	for move in position.legal_moves():
+		position.make_move(move)
+		assert(position.key == position.compute_key())
+		for reply in position.legal_moves():
+			position.make_move(reply)
+			assert(position.key == position.compute_key())
+			position.unmake_move()
+		position.unmake_move()
+		assert(position.key == start_key)
+
+	# The same position reached by two move orders has the same key
+	def play(position, names):
+		for name in names:
+			position = position.play(encode_move(square_from_name(name[:2]),
+												 square_from_name(name[2:])))
+		return position
+	start = Position.from_board(make_start_board(), 'w')
+	first = play(start, ['g1f3', 'g8f6', 'b1c3', 'b8c6'])
+	second = play(start, ['b1c3', 'b8c6', 'g1f3', 'g8f6'])
+	assert(first.key == second.key)
+	assert(first.key != start.key)
+
+
+def test_transposition_table():
+	"""Test function for TranspositionTable.probe() and store().
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	table = TranspositionTable(1)
+	size = len(table.words)
+	position = Position.from_board(make_start_board(), 'w')
+	move = position.legal_moves()[0]
+	assert(table.probe(position.key) is None)
+	table.store(position.key, move, -35, 6, LOWER)
+	assert(table.probe(position.key) == (move, -35, 6, LOWER))
+
+	# Keys in the same bucket: the third one pushes out the shallowest
+	keys = [position.key + n * table.buckets for n in range(1, 4)]
+	table.store(keys[0], 0, 10, 2, EXACT)
+	table.store(keys[1], 0, 20, 1, UPPER)
+	assert(table.probe(keys[0]) is None)
+	assert(table.probe(keys[1]) == (0, 20, 1, UPPER))
+
+	# In a new search, a deep entry from the last search goes before a
+	# shallow new one
+	table.new_search()
+	table.store(keys[1], 0, 20, 1, UPPER)
+	table.store(keys[2], 0, 30, 1, EXACT)
+	assert(table.probe(position.key) is None)
+	assert(table.probe(keys[1]) == (0, 20, 1, UPPER))
+	assert(table.probe(keys[2]) == (0, 30, 1, EXACT))
+	assert(table.hits == 4 and table.misses == 3 and table.collisions == 2)
+	assert(len(table.words) == size)
+
+	# A shallower bound keeps the deeper entry of the same search, but not
+	# its move. An exact result, or one in a later search, replaces it.
+	table = TranspositionTable(1)
+	other = position.legal_moves()[1]
+	table.store(position.key, move, -35, 6, LOWER)
+	table.store(position.key, other, 50, 3, UPPER)
+	assert(table.probe(position.key) == (other, -35, 6, LOWER))
+	table.store(position.key, 0, 50, 3, UPPER)
+	assert(table.probe(position.key) == (other, -35, 6, LOWER))
+	table.store(position.key, move, 10, 2, EXACT)
+	assert(table.probe(position.key) == (move, 10, 2, EXACT))
+	table.store(position.key, move, -35, 6, LOWER)
+	table.new_search()
+	table.store(position.key, 0, 50, 3, UPPER)
+	assert(table.probe(position.key) == (move, 50, 3, UPPER))
+
+
+def test_engine_search():
+	"""Test function for Engine.search() and Position.repetitions().
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	engine = Engine(1)
+
+	# The rook mates on the back row
+	position = Position.from_fen('6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1')
+	before = position.to_bytes()
+	result = engine.search(position, depth = 3)
+	assert(result.move == encode_move(square_from_name('d1'), square_from_name('d8')))
+	assert(result.score == MATE - 1)
+	assert(result.pv == [result.move])
+	assert(position.to_bytes() == before and position.history == [])
+
+	# A node limit still gives a legal move and a line starting with it
+	position = Position.from_board(make_start_board(), 'w')
+	result = engine.search(position, nodes = 2000)
+	assert(result.move in position.legal_moves())
+	assert(result.pv[0] == result.move)
+	assert(result.nodes < 2000 + 1024)
+
+	# Depth 0 searches nothing, but still gives a move to play
+	result = engine.search(position, depth = 0)
+	assert(result.depth == 0 and result.nodes == 0)
+	assert(result.move == position.legal_moves()[0])
+
+	# Knights out and back repeat the start position
+	for name in ['g1f3', 'g8f6', 'f3g1', 'f6g8']:
+		assert(position.repetitions() == 0)
+		position.make_move(encode_move(square_from_name(name[:2]),
+									   square_from_name(name[2:])))
+	assert(position.repetitions() == 1)
+
+
+def test_move_ordering():
+	"""Test function for MovePicker stages and MoveOrderer.cutoff().
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	# The knight can take an undefended pawn, and the queen a defended one
+	position = Position.from_fen('4k3/8/2p5/3pp3/8/5N2/8/3QK3 w - - 0 1')
+	ordering = MoveOrderer(8)
+	ordering.cutoff(position, legal_move(position, 'f3g5'), 0, 3)
+	assert(ordering.killers[0][0] == legal_move(position, 'f3g5'))
+
+	# The table move goes first, then the good capture, the killer, the
+	# other quiet moves, and last the queen losing herself for a pawn
+	picker = MovePicker(position, ordering, 0, legal_move(position, 'e1f2'))
+	picked = []
+	stages = []
+	for move in picker:
+		picked.append(move)
+		stages.append(picker.stage)
+	assert(sorted(picked) == sorted(position.legal_moves()))
+	assert(stages == sorted(stages))
+	assert(stages[:3] == [TABLE_MOVE, GOOD_CAPTURES, KILLERS])
+	assert(stages[3:-1] == [QUIET_MOVES] * (len(picked) - 4))
+	assert(stages[-1] == BAD_CAPTURES)
+	assert(picked[:3] == [legal_move(position, 'e1f2'), legal_move(position, 'f3e5'),
+						  legal_move(position, 'f3g5')])
+	assert(picked[-1] == legal_move(position, 'd1d5'))
+
+
+def test_see():
+	"""Test function for see(), hanging_pieces() and Engine.quiesce().
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	# The rook wins an undefended pawn
+	position = Position.from_fen('1k1r4/1pp4p/p7/4p3/8/P5P1/1PP4P/2K1R3 w - - 0 1')
+	assert(see(position, legal_move(position, 'e1e5')) == 100)
+
+	# The knight takes a pawn, but more black pieces than white join in
+	position = Position.from_fen('1k1r3q/1ppn3p/p4b2/4p3/8/P2N2P1/1PP1R1BP/2K1Q3 w - - 0 1')
+	assert(see(position, legal_move(position, 'd3e5')) == -220)
+
+	# Pawn takes pawn: the defended one trades evenly, the queen loses herself
+	position = Position.from_fen('4k3/8/2p5/3p4/4P3/8/8/4K3 w - - 0 1')
+	assert(see(position, legal_move(position, 'e4d5')) == 0)
+	assert(hanging_pieces(position, 0) == 1 << square_from_name('e4'))
+	assert(hanging_pieces(position, 1) == 0)
+	position = Position.from_fen('4k3/8/2p5/3p4/4Q3/8/8/4K3 w - - 0 1')
+	assert(see(position, legal_move(position, 'e4d5')) == -800)
+
+	# Taking the pawn is bad, so the quiescence search stands pat, and it
+	# sees the queen lost after taking
+	engine = Engine(1)
+	assert(engine.quiesce(position, -MATE, MATE, 0) == evaluate(position))
+	position.make_move(legal_move(position, 'e4d5'))
+	assert(-engine.quiesce(position, -MATE, MATE, 1) < 0)
+
+
+def test_move_picker():
+	"""Test function for MovePicker, which hands out moves in stages.
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	position = Position.from_fen(REFERENCE_POSITIONS[1][1])
+	ordering = MoveOrderer(8)
+	moves = position.legal_moves()
+	table_move = [m for m in moves if is_quiet(m)][-1]
+
+	# Every legal move comes out once, the table move first
+	picked = list(MovePicker(position, ordering, 0, table_move))
+	assert(sorted(picked) == sorted(moves))
+	assert(picked[0] == table_move)
+	assert(not is_quiet(picked[1]))
+
+	# Stopping after the table move leaves the later stages ungenerated
+	picker = MovePicker(position, ordering, 0, table_move)
+	for move in picker:
+		break
+	assert(picker.stage == TABLE_MOVE and picker.count == 1)
+
+	# The quiescence search only gets captures that don't lose material
+	picker = MovePicker(position, ordering, 0, captures_only = True)
+	captures = list(picker)
+	assert(captures and all(not is_quiet(m) and see(position, m) >= 0 for m in captures))
+
+	# A table move that isn't legal here, like one from a key collision, is
+	# left out
+	assert(list(MovePicker(position, ordering, 0, 1))[0] != 1)
+
+
+def test_selective_search():
+	"""Test function for the null move and the Engine search switches.
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	position = Position.from_fen(REFERENCE_POSITIONS[1][1])
+	before = position.to_bytes()
+	key = position.key
+	position.make_null_move()
+	assert(position.side == 1 and position.key == position.compute_key())
+	position.unmake_null_move()
+	assert(position.to_bytes() == before and position.key == key)
+
+	# Each switch on its own, and all of them off, still finds the mate
+	position = Position.from_fen('6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1')
+	mate = encode_move(square_from_name('d1'), square_from_name('d8'))
+	for option in SEARCH_OPTIONS:
+		engine = Engine(1, **{option: False})
+		assert(engine.search(position, depth = 4).move == mate)
+	engine = Engine(1, **{option: False for option in SEARCH_OPTIONS})
+	assert(engine.search(position, depth = 4).score == MATE - 1)
+
+	# Reductions and pruning search fewer nodes to the same depth
+	position = Position.from_fen(REFERENCE_POSITIONS[1][1])
+	full = engine.search(position, depth = 3).nodes
+	assert(Engine(1).search(position, depth = 3).nodes < full)
+
+
+def test_principal_variation():
+	"""Test function for the PV table and aspiration windows of Engine.search().
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	engine = Engine(1)
+	position = Position.from_fen(REFERENCE_POSITIONS[1][1])
+	lines = []
+	result = engine.search(position, depth = 5,
+						   callback = lambda result: lines.append(list(result.pv)))
+
+	# One line for each iteration, as long as the iteration was deep
+	assert(len(lines) == 5)
+	assert(lines[-1] == result.pv and result.pv[0] == result.move)
+	assert(len(result.pv) >= 5)
+	assert(result.pv == engine.principal_variation())
+
+	# The line is made of legal moves, one after another
+	for move in result.pv:
+		assert(move in position.legal_moves())
+		position.make_move(move)
+	for move in result.pv:
+		position.unmake_move()
+	assert(position.to_bytes() == Position.from_fen(REFERENCE_POSITIONS[1][1]).to_bytes())
+
+
+def test_parallel_search():
+	"""Test function for ParallelSearch, which shares one table between
+	processes.
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	position = Position.from_fen('6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1')
+	with ParallelSearch(2, 1) as search:
+		result = search.search(position, depth = 3)
+		assert(result.move == encode_move(square_from_name('d1'), square_from_name('d8')))
+		assert(result.score == MATE - 1)
+
+		# The main process stored the root in the shared table
+		assert(search.table.probe(position.key)[0] == result.move)
+		assert(search.shared.buf[0] == 1)
+
+		# Clearing keeps the same pool and block, with an empty table
+		shared = search.shared
+		search.clear()
+		assert(search.table.probe(position.key) is None)
+		assert(search.search(position, depth = 3).score == MATE - 1)
+		assert(search.shared is shared)
+
+	# Helpers leave out different iterations, but all finish the deepest one
+	engine = Engine(1)
+	start = Position.from_fen(REFERENCE_POSITIONS[0][1])
+	for skip, searched in [((1, 0), [2, 4, 5]), ((1, 1), [1, 3, 5]),
+	                       ((2, 2), [2, 3, 5]), ((2, 3), [1, 2, 5])]:
+		depths = []
+		result = engine.search(start, 5, callback = lambda result: depths.append(result.depth),
+		                       skip = skip)
+		assert(depths == searched)
+		assert(result.depth == 5)
+	assert(len(set(helper_skip(helper) for helper in range(1, 21))) == 20)
+	assert(search.shared is None)
+
+	# A worker process lets go of a block once it searches for another
+	with ParallelSearch(1, 1, 'processes') as old, ParallelSearch(1, 1, 'processes') as new:
+		data = position.to_bytes()
+		search_worker([old.shared.name, 1, data, [], 1, None, None, (1, 0), 0])
+		handle = attached[old.shared.name][0]
+		result = search_worker([new.shared.name, 1, data, [], 1, None, None, (1, 0), 0])
+		assert(result.depth == 1)
+		assert(list(attached) == [new.shared.name] and handle.buf is None)
+		detach(new.shared.name)
+
+
+def test_thread_backend():
+	"""Test function for the thread workers used when the GIL is disabled.
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	with make_executor(2, 'threads') as executor:
+		assert(isinstance(executor, ThreadPoolExecutor))
+	with make_executor(2, 'processes') as executor:
+		assert(isinstance(executor, ProcessPoolExecutor))
+
+	name, fen, counts = REFERENCE_POSITIONS[1]
+	position = Position.from_fen(fen)
+	assert(parallel_perft(position, 2, 2, backend = 'threads') == counts[1])
+
+	position = Position.from_fen('6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1')
+	with ParallelSearch(2, 1, 'threads') as search:
+		result = search.search(position, depth = 3)
+		assert(result.move == encode_move(square_from_name('d1'), square_from_name('d8')))
+		assert(result.score == MATE - 1)
+		assert(search.table.probe(position.key)[0] == result.move)
+		assert(search.stop_event.is_set())
+	# The helpers searched copies, so the position is as it was
+	assert(position.fen() == '6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1')
+
+
+def wait_for_search(worker, timeout = 30):
+	"""Collects the responses of a worker's newest request until it is done.
+
+	Args:
+		worker(EngineWorker): The worker.
+		timeout(float): The longest wait for each response, in seconds.
+
+	Returns:
+		list: The (kind, SearchResult) pairs, the last one DONE. Raises
+		assertion error if a response doesn't come in time.
+	"""
+	found = []
+	while not found or found[-1][0] != DONE:
+		responses = worker.poll(timeout)
+		assert(responses)
+		found += responses
+	return found
+
+
+def test_engine_worker():
+	"""Test function for EngineWorker, which searches on a background thread.
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	worker = EngineWorker(1)
+	# A long search, superseded by a short one before it ends
+	worker.submit(Position.from_fen(REFERENCE_POSITIONS[0][1]), movetime = 60)
+	position = Position.from_fen('6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1')
+	worker.submit(position, depth = 3)
+	# The position can change as soon as it is submitted
+	position.make_move(position.legal_moves()[0])
+
+	found = wait_for_search(worker)
+	# Only the newest request is answered
+	assert(all(kind == INFO for kind, result in found[:-1]))
+	for kind, result in found:
+		assert(result.move == encode_move(square_from_name('d1'), square_from_name('d8')))
+	assert(found[-1][1].score == MATE - 1)
+
+	# A cancelled search stops, and nothing of it is collected
+	worker.submit(position, movetime = 60)
+	worker.cancel()
+	worker.close()
+	assert(not worker.thread.is_alive())
+	assert(worker.poll() == [])
+
+
+def test_pondering():
+	"""Test function for pondering: searching the expected reply in advance.
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	worker = EngineWorker(1)
+	# After Kh1, the reply Kh8 is expected, and Rd8 then mates
+	position = Position.from_fen('6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1')
+	position.make_move(encode_move(square_from_name('g1'), square_from_name('h1')))
+	reply = encode_move(square_from_name('g8'), square_from_name('h8'))
+	worker.ponder(position, reply, depth = 3)
+	# Nothing is handed out while pondering
+	assert(worker.poll() == [])
+
+	# The expected reply is played: the pondering search is the answer
+	position.make_move(reply)
+	assert(worker.ponderhit(position))
+	found = wait_for_search(worker)
+	assert(found[-1][1].move == encode_move(square_from_name('d1'), square_from_name('d8')))
+	assert(found[-1][1].score == MATE - 1)
+
+	# Another reply is played: the pondering search is dropped
+	position.unmake_move()
+	worker.ponder(position, reply, depth = 3)
+	position.make_move(encode_move(square_from_name('h7'), square_from_name('h6')))
+	assert(not worker.ponderhit(position))
+	assert(worker.poll() == [])
+	worker.close()
+
+
+def test_uci():
+	"""Test function for the UCI front end.
+	Args:
+		None
+
+	Returns:
+		Passes silently if all asserts pass.
+		Otherwise, raises assertion error.
+
+	"""
+	lines = []
+	uci = UciEngine(lines.append, 1)
+	uci.handle('uci')
+	uci.handle('isready')
+	assert(lines[-2:] == ['uciok', 'readyok'])
+
+	# Moves are played from the start position
+	uci.handle('position startpos moves e2e4 e7e5 g1f3')
+	assert(uci.position.fen() == 'rnbqkbnr/pppp1ppp/8/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 1 2')
+
+	lines.clear()
+	uci.handle('position fen 6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1')
+	uci.handle('go depth 3')
+	uci.finish()
+	assert(lines[0].startswith('info depth 1 score mate 1 nodes '))
+	assert(' nps ' in lines[0] and ' hashfull ' in lines[0])
+	assert(lines[0].endswith(' pv d1d8'))
+	assert(lines[-1] == 'bestmove d1d8')
+
+	# An infinite search only ends with stop
+	lines.clear()
+	uci.handle('position startpos')
+	uci.handle('go infinite')
+	time.sleep(0.2)
+	uci.handle('isready')
+	assert('readyok' in lines)
+	assert(uci.thread.is_alive())
+	uci.handle('stop')
+	assert(lines[-1].startswith('bestmove '))
+	assert(uci.thread is None)
+
+	assert(uci_score(35) == 'cp 35')
+	assert(uci_score(MATE - 3) == 'mate 2')
+	assert(uci_score(-MATE + 2) == 'mate -1')
+	position = Position.from_fen('6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1')
+	assert(think_time(position, {'movetime': 500}) == 0.5)
+	assert(think_time(position, {'wtime': 31500, 'btime': 100}) == 1.0)
+	assert(think_time(position, {}) is None)
+
+	# The front end runs without a window
+	check = subprocess.run([sys.executable, '-c', 'import sys, my_uci; '
+	                        'assert "tkinter" not in sys.modules'],
+	                       cwd = os.path.dirname(os.path.abspath(__file__)))
+	assert(check.returncode == 0)
+
+
 test_in_board()
\ No newline at end of file